@@ -0,0 +1,67 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Micro-benchmark of flatten_multiindex against the pivot_table implementation it replaced.
+
+Run with: python -m tests.benchmarks.benchmark_flatten_multiindex
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from zefir_api.api.crud.utils import flatten_multiindex
+
+
+def pivot_flatten(df: pd.DataFrame) -> pd.DataFrame:
+    return df.pivot_table(
+        index=df.index.names[0],
+        columns=df.index.names[1],
+        values=df.columns[0],
+        aggfunc="first",
+    )
+
+
+def create_df(n_names: int, n_years: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [[f"GEN_{i}" for i in range(n_names)], range(n_years)], names=["name", "year"]
+    )
+    values = rng.random(len(index))
+    values[rng.random(len(index)) < 0.1] = np.nan
+    return pd.DataFrame({"value": values}, index=index)
+
+
+def main() -> None:
+    for n_names, n_years in [(50, 20), (1000, 20), (10000, 30)]:
+        df = create_df(n_names, n_years)
+        pd.testing.assert_frame_equal(flatten_multiindex(df), pivot_flatten(df))
+        number = 20
+        pivot_time = timeit.timeit(lambda: pivot_flatten(df), number=number) / number
+        flatten_time = (
+            timeit.timeit(lambda: flatten_multiindex(df), number=number) / number
+        )
+        print(
+            f"{n_names} x {n_years}: pivot_table {pivot_time * 1e3:.2f} ms, "
+            f"flatten_multiindex {flatten_time * 1e3:.2f} ms, "
+            f"speedup {pivot_time / flatten_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
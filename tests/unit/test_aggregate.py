@@ -0,0 +1,210 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zefir_api.api.crud.aggregate import (
+    _classify_aggregates,
+    _filter_by_agg_type,
+    _get_aggregate_generation_demand,
+    _get_usage_per_building,
+    get_details,
+)
+from zefir_api.api.parameters import AggregateType, ConsumptionType
+from zefir_api.api.translation import translator
+
+YEARS = [0, 1, 2]
+
+
+def _aggregate(
+    name: str, n_consumers: list[int], stacks: list[str], energy_types: list[str]
+) -> Mock:
+    aggr = Mock(
+        n_consumers=pd.Series(n_consumers, index=YEARS),
+        average_area=100.0,
+        available_stacks=stacks,
+        yearly_energy_usage={
+            energy_type: pd.Series([1.0, 2.0, 3.0], index=YEARS)
+            for energy_type in energy_types
+        },
+    )
+    aggr.name = name
+    return aggr
+
+
+@pytest.fixture
+def mock_ze() -> Mock:
+    aggregates = [
+        # matches both low_consumption (_AB) and average_consumption (_C)
+        _aggregate("SINGLE_FAMILY_AB_C", [10, 11, 12], ["LBS_SF_AB"], ["HEAT", "EE"]),
+        _aggregate("SINGLE_FAMILY_D", [5, 5, 5], ["LBS_SF_D"], ["EE", "HEAT"]),
+        _aggregate("MULTI_FAMILY_EF", [2, 3, 4], ["LBS_MF_EF"], ["HEAT"]),
+        # matches no AggregateType
+        _aggregate("INDUSTRY_C", [7, 7, 7], ["LBS_IND_C"], ["HEAT"]),
+    ]
+    lbs_sf = Mock(buses={"HEAT": {"SF_HEAT"}, "EE": {"SF_EE"}})
+    lbs_sf.name = "LBS_SF_AB"
+    lbs_mf = Mock(buses={"HEAT": {"MF_HEAT"}})
+    lbs_mf.name = "LBS_MF_EF"
+    network = Mock(
+        aggregated_consumers={aggr.name: aggr for aggr in aggregates},
+        generators={
+            "HP_SF_1": Mock(buses={"SF_HEAT"}),
+            "HP_SF_2": Mock(buses={"SF_HEAT"}),
+            "PV_SF": Mock(buses={"SF_EE"}),
+            "BOILER_MF": Mock(buses={"MF_HEAT"}),
+        },
+        buses={
+            "SF_HEAT": Mock(energy_type="HEAT"),
+            "SF_EE": Mock(energy_type="EE"),
+            "MF_HEAT": Mock(energy_type="HEAT"),
+        },
+        local_balancing_stacks={"LBS_SF_AB": lbs_sf, "LBS_MF_EF": lbs_mf},
+    )
+    ze = Mock(network=network, _year_sample=YEARS)
+    ze.aggregated_consumer_params.get_fractions.return_value = {
+        aggr.name: pd.DataFrame({aggr.available_stacks[0]: 1.0}, index=YEARS)
+        for aggr in aggregates
+    }
+    ze.aggregated_consumer_params.get_n_consumers.return_value = {
+        aggr.name: aggr.n_consumers for aggr in aggregates
+    }
+    generators = ["BOILER_MF", "HP_SF_1", "HP_SF_2", "PV_SF"]
+    ze.source_params.get_generation_demand.return_value = pd.DataFrame(
+        {
+            "HEAT": [float(i) for i in range(12)],
+            "EE": [0.5] * 12,
+        },
+        index=pd.MultiIndex.from_product(
+            [generators, YEARS], names=["Generator", "Year"]
+        ),
+    )
+    return ze
+
+
+def _classify_by_aggregate_type(
+    ze: Mock, aggregate_type: AggregateType
+) -> dict[str, list[str]]:
+    """Reference classification filtering the network once per aggregate type."""
+    aggregates = _filter_by_agg_type(ze=ze, aggregate_type=aggregate_type)
+    return {
+        member.name: [agg.name for agg in aggregates if member.value in agg.name]
+        for member in ConsumptionType
+    }
+
+
+@pytest.mark.parametrize("aggregate_type", list(AggregateType))
+def test_classify_aggregates_matches_filtering_per_type(
+    mock_ze: Mock, aggregate_type: AggregateType
+) -> None:
+    classified = _classify_aggregates(mock_ze)[aggregate_type]
+    assert {
+        consumption_type: [agg.name for agg in aggregates]
+        for consumption_type, aggregates in classified.items()
+    } == _classify_by_aggregate_type(mock_ze, aggregate_type)
+
+
+def test_classify_aggregates_skips_unknown_aggregate_type(mock_ze: Mock) -> None:
+    classified = _classify_aggregates(mock_ze)
+    assert all(
+        agg.name != "INDUSTRY_C"
+        for per_consumption in classified.values()
+        for aggregates in per_consumption.values()
+        for agg in aggregates
+    )
+
+
+@pytest.mark.parametrize("aggregate_type", list(AggregateType))
+def test_get_details_per_aggregate_type(
+    mock_ze: Mock, aggregate_type: AggregateType
+) -> None:
+    details = get_details(mock_ze, aggregate_type)
+    expected = _classify_by_aggregate_type(mock_ze, aggregate_type)
+    assert [detail.name for detail in details] == list(expected)
+    aggregates = mock_ze.network.aggregated_consumers
+    for detail in details:
+        names = expected[detail.name]
+        assert detail.agg_amount_of_building == (
+            sum(aggregates[name].n_consumers for name in names).to_list()
+            if names
+            else []
+        )
+        assert len(detail.area) == len(names)
+
+
+def test_get_aggregate_generation_demand_sums_generators(mock_ze: Mock) -> None:
+    demand = _get_aggregate_generation_demand(mock_ze)
+    assert list(demand) == ["HEAT", "EE"]
+    # HP_SF_1 and HP_SF_2 supply the same aggregate, PV_SF has no heat bus
+    pd.testing.assert_frame_equal(
+        demand["HEAT"],
+        pd.DataFrame(
+            [[0.0, 1.0, 2.0], [3.0 + 6.0, 4.0 + 7.0, 5.0 + 8.0]],
+            index=["MULTI_FAMILY_EF", "SINGLE_FAMILY_AB_C"],
+            columns=pd.Index(YEARS, name="Year"),
+        ),
+        check_names=False,
+    )
+    assert demand["EE"].index.to_list() == ["SINGLE_FAMILY_AB_C"]
+    assert demand["EE"].to_numpy().tolist() == [[0.5, 0.5, 0.5]]
+
+
+@pytest.mark.parametrize(
+    ("agg_names", "energy_types"),
+    [
+        pytest.param(["SINGLE_FAMILY_D"], ["EE", "HEAT"], id="single aggregate"),
+        pytest.param(
+            ["SINGLE_FAMILY_D", "SINGLE_FAMILY_AB_C"],
+            ["EE", "HEAT"],
+            id="first aggregate order",
+        ),
+        pytest.param(
+            ["SINGLE_FAMILY_AB_C", "SINGLE_FAMILY_D"],
+            ["HEAT", "EE"],
+            id="network order",
+        ),
+    ],
+)
+def test_get_usage_per_building_keeps_energy_type_order(
+    mock_ze: Mock, agg_names: list[str], energy_types: list[str]
+) -> None:
+    usage = _get_usage_per_building(mock_ze, agg_names, len(YEARS))
+    assert [item.energy_type for item in usage] == [
+        translator.translated_energy.get(energy_type, energy_type)
+        for energy_type in energy_types
+    ]
+
+
+def test_get_usage_per_building_adds_demand(mock_ze: Mock) -> None:
+    usage = {
+        item.energy_type: item.values
+        for item in _get_usage_per_building(
+            mock_ze, ["SINGLE_FAMILY_AB_C", "SINGLE_FAMILY_D"], len(YEARS)
+        )
+    }
+    usage_per_consumer = np.array([1.0, 2.0, 3.0])
+    n_consumers = np.array([10, 11, 12]) + np.array([5, 5, 5])
+    heat_demand = np.array([9.0, 11.0, 13.0])
+    assert usage[translator.translated_energy.get("HEAT", "HEAT")] == pytest.approx(
+        usage_per_consumer * n_consumers + heat_demand
+    )
+    assert usage[translator.translated_energy.get("EE", "EE")] == pytest.approx(
+        usage_per_consumer * n_consumers + 0.5
+    )
@@ -0,0 +1,92 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zefir_api.api.crud.utils import AggregateMatrices
+
+
+def _aggregate(
+    name: str,
+    n_consumers: list[int],
+    average_area: float,
+    yearly_energy_usage: dict[str, list[float]],
+) -> Mock:
+    aggr = Mock(
+        n_consumers=pd.Series(n_consumers),
+        average_area=average_area,
+        yearly_energy_usage={
+            energy_type: pd.Series(values)
+            for energy_type, values in yearly_energy_usage.items()
+        },
+    )
+    aggr.name = name
+    return aggr
+
+
+@pytest.fixture
+def mock_network() -> Mock:
+    network = Mock()
+    network.aggregated_consumers = {
+        aggr.name: aggr
+        for aggr in [
+            _aggregate(
+                "SINGLE_FAMILY_C",
+                [10, 12],
+                100.0,
+                {"HEAT": [1.0, 2.0], "EE": [0.5, 0.5]},
+            ),
+            _aggregate("MULTI_FAMILY_AB", [3, 4], 500.0, {"HEAT": [4.0, 3.0]}),
+        ]
+    }
+    return network
+
+
+def test_aggregate_matrices_stack_aggregates(mock_network: Mock) -> None:
+    matrices = AggregateMatrices(mock_network)
+    assert matrices.n_consumers.index.to_list() == [
+        "SINGLE_FAMILY_C",
+        "MULTI_FAMILY_AB",
+    ]
+    np.testing.assert_array_equal(matrices.n_consumers.to_numpy(), [[10, 12], [3, 4]])
+    assert matrices.average_area.to_list() == [100.0, 500.0]
+    assert list(matrices.yearly_energy_usage) == ["HEAT", "EE"]
+    assert matrices.yearly_energy_usage["EE"].index.to_list() == ["SINGLE_FAMILY_C"]
+
+
+@pytest.mark.parametrize(
+    ("energy_type", "aggr_names", "expected"),
+    [
+        pytest.param("HEAT", None, [[10.0, 24.0], [12.0, 12.0]], id="all aggregates"),
+        pytest.param("HEAT", ["MULTI_FAMILY_AB"], [[12.0, 12.0]], id="selected"),
+        pytest.param(
+            "EE", ["SINGLE_FAMILY_C", "MULTI_FAMILY_AB"], [[5.0, 6.0]], id="partial"
+        ),
+        pytest.param("COLD", None, np.empty((0, 2)), id="unknown energy type"),
+    ],
+)
+def test_get_yearly_usage(
+    mock_network: Mock,
+    energy_type: str,
+    aggr_names: list[str] | None,
+    expected: list[list[float]],
+) -> None:
+    usage = AggregateMatrices(mock_network).get_yearly_usage(energy_type, aggr_names)
+    np.testing.assert_array_equal(usage.to_numpy(dtype=float), expected)
@@ -0,0 +1,84 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pandas as pd
+import pytest
+
+from zefir_api.api.cache import MemoizedQuery, ResponseCache
+
+
+def test_response_cache_counts_hits_and_misses() -> None:
+    cache: ResponseCache[str] = ResponseCache()
+    computed: list[str] = []
+
+    def compute() -> str:
+        computed.append("ee_usage")
+        return "response"
+
+    assert cache.get_or_compute(0, "ee_usage", compute) == "response"
+    assert cache.get_or_compute(0, "ee_usage", compute) == "response"
+    assert cache.get_or_compute(1, "ee_usage", compute) == "response"
+    assert computed == ["ee_usage", "ee_usage"]
+    assert cache.stats == {"hits": 1, "misses": 2, "size": 2}
+
+
+def test_response_cache_invalidate_scenario() -> None:
+    cache: ResponseCache[int] = ResponseCache()
+    cache.get_or_compute(0, "capex", lambda: 1)
+    cache.get_or_compute(0, "opex", lambda: 2)
+    cache.get_or_compute(1, "capex", lambda: 3)
+    cache.invalidate(0)
+    assert (0, "capex") not in cache
+    assert (1, "capex") in cache
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+class FakeQuery:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def get_emission(self, level: str = "element") -> pd.DataFrame:
+        self.calls.append(level)
+        return pd.DataFrame({"CO2": [1.0, 2.0]}, index=["GEN_1", "GEN_2"])
+
+    def get_fractions(self, names: list[str] | None = None) -> dict[str, pd.DataFrame]:
+        self.calls.append("fractions")
+        return {"SINGLE_FAMILY": pd.DataFrame({"SF_GAS": [0.5, 0.5]})}
+
+
+def test_memoized_query_shares_results() -> None:
+    query = FakeQuery()
+    memoized = MemoizedQuery(query)
+    first = memoized.get_emission(level="type")
+    second = memoized.get_emission(level="type")
+    memoized.get_emission(level="element")
+    memoized.get_fractions(["SINGLE_FAMILY"])
+    memoized.get_fractions(names=["SINGLE_FAMILY"])
+    memoized.get_fractions(["SINGLE_FAMILY"])
+    assert query.calls == ["type", "element", "fractions", "fractions"]
+    assert first is not second
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_memoized_query_results_are_read_only() -> None:
+    memoized = MemoizedQuery(FakeQuery())
+    df = memoized.get_emission()
+    df.index = ["A", "B"]
+    with pytest.raises(ValueError):
+        df.loc["A", "CO2"] = 10.0
+    assert memoized.get_emission().index.to_list() == ["GEN_1", "GEN_2"]
+    assert memoized.get_emission()["CO2"].to_list() == [1.0, 2.0]
@@ -0,0 +1,122 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import defaultdict
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from zefir_api.api.crud.costs import (
+    _calculate_ets_emission_costs,
+    _get_generator_emission_fees,
+)
+from zefir_api.api.crud.utils import flatten_multiindex
+
+YEARS = [0, 1, 2]
+
+
+def _emission_fee(name: str, emission_type: str, prices: list[float]) -> Mock:
+    fee = Mock(emission_type=emission_type, price=pd.Series(prices, index=YEARS))
+    fee.name = name
+    return fee
+
+
+@pytest.fixture
+def mock_ze() -> Mock:
+    network = Mock()
+    network.emission_fees = {
+        fee.name: fee
+        for fee in [
+            _emission_fee("ETS_CO2", "CO2", [10.0, 20.0, 30.0]),
+            _emission_fee("ETS_CO2_HIGH", "CO2", [50.0, 60.0, 70.0]),
+            _emission_fee("ETS_PM10", "PM10", [1.0, 2.0, 3.0]),
+        ]
+    }
+    network.generators = {
+        "COAL": Mock(emission_fee={"ETS_CO2", "ETS_PM10"}),
+        "GAS": Mock(emission_fee={"ETS_CO2_HIGH"}),
+        "BIOMASS": Mock(emission_fee={"ETS_PM10"}),
+        "PV": Mock(emission_fee=set()),
+    }
+    return Mock(network=network)
+
+
+@pytest.fixture
+def emissions_df() -> pd.DataFrame:
+    index = pd.MultiIndex.from_product(
+        [["BIOMASS", "COAL", "GAS", "PV"], YEARS], names=["Generator", "Year"]
+    )
+    return pd.DataFrame(
+        {
+            "CO2": [float(i) for i in range(len(index))],
+            "PM10": [float(i % 5) for i in range(len(index))],
+        },
+        index=index,
+    )
+
+
+def _calculate_ets_emission_costs_per_generator(
+    ze: Mock, emissions_df: pd.DataFrame, years: list[int]
+) -> dict[str, pd.DataFrame]:
+    """Reference implementation charging generators one by one."""
+    emissions_dict = {
+        emission_name: flatten_multiindex(emissions_df[[emission_name]])
+        for emission_name in emissions_df.columns
+    }
+    ets_fee_dict: dict[str, dict] = defaultdict(dict)
+    for ets in ze.network.emission_fees.values():
+        ets_fee_dict[ets.emission_type][ets.name] = ets.price.loc[years].T
+    for et, df in emissions_dict.items():
+        if et in ets_fee_dict:
+            emission_fees_per_et = set(ets_fee_dict[et].keys())
+            for gen_name in df.index:
+                gen_ef = ze.network.generators[gen_name].emission_fee
+                common_gen_ef = emission_fees_per_et.intersection(gen_ef)
+                if not gen_ef or not common_gen_ef:
+                    df = df.drop(gen_name)
+                else:
+                    ets_df = ets_fee_dict[et][common_gen_ef.pop()].to_list()
+                    df.loc[[gen_name]] = df.loc[[gen_name]].mul(ets_df)
+            emissions_dict[et] = df
+    return emissions_dict
+
+
+def test_get_generator_emission_fees(mock_ze: Mock) -> None:
+    fees = _get_generator_emission_fees(mock_ze.network)
+    assert {et: series.to_dict() for et, series in fees.items()} == {
+        "CO2": {"COAL": "ETS_CO2", "GAS": "ETS_CO2_HIGH"},
+        "PM10": {"COAL": "ETS_PM10", "BIOMASS": "ETS_PM10"},
+    }
+
+
+def test_calculate_ets_emission_costs_matches_per_generator_loop(
+    mock_ze: Mock, emissions_df: pd.DataFrame
+) -> None:
+    result = _calculate_ets_emission_costs(mock_ze, emissions_df, YEARS)
+    expected = _calculate_ets_emission_costs_per_generator(mock_ze, emissions_df, YEARS)
+    assert list(result) == list(expected)
+    for emission_type, expected_df in expected.items():
+        pd.testing.assert_frame_equal(result[emission_type], expected_df)
+    assert "PV" not in result["CO2"].index
+    assert "BIOMASS" not in result["CO2"].index
+
+
+def test_calculate_ets_emission_costs_without_fees(
+    mock_ze: Mock, emissions_df: pd.DataFrame
+) -> None:
+    mock_ze.network.emission_fees = {}
+    assert _calculate_ets_emission_costs(mock_ze, emissions_df, YEARS) == {}
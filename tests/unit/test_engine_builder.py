@@ -0,0 +1,48 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from zefir_api.api import engine_builder
+
+
+class FakeEngine:
+    def __init__(self, scenario_name: str) -> None:
+        self.scenario_name = scenario_name
+
+    @classmethod
+    def create_from_config(cls, config_path: Path) -> "FakeEngine":
+        return cls(config_path.stem)
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_build_engines_keeps_scenario_order(
+    monkeypatch: MonkeyPatch, workers: int
+) -> None:
+    monkeypatch.setattr(engine_builder, "CachedZefirEngine", FakeEngine)
+    config_paths = {
+        2: Path("configs/scenario_2.ini"),
+        0: Path("configs/scenario_0.ini"),
+        1: Path("configs/scenario_1.ini"),
+    }
+    engines = engine_builder.build_engines(config_paths, workers=workers)
+    assert list(engines) == [2, 0, 1]
+    assert {
+        scenario_id: engine.scenario_name for scenario_id, engine in engines.items()
+    } == {2: "scenario_2", 0: "scenario_0", 1: "scenario_1"}
@@ -0,0 +1,90 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zefir_api.api.crud.utils import flatten_multiindex
+
+
+def _pivot_flatten(df: pd.DataFrame) -> pd.DataFrame:
+    return df.pivot_table(
+        index=df.index.names[0],
+        columns=df.index.names[1],
+        values=df.columns[0],
+        aggfunc="first",
+    )
+
+
+def _create_df(values: list, tuples: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"capex": values},
+        index=pd.MultiIndex.from_tuples(tuples, names=["technology", "year"]),
+    )
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        pytest.param(
+            _create_df([1, 2, 3, 4], [("b", 1), ("b", 0), ("a", 1), ("a", 0)]),
+            id="unsorted int",
+        ),
+        pytest.param(
+            _create_df([1, 2, 3], [("b", 1), ("a", 0), ("a", 1)]),
+            id="int with gap",
+        ),
+        pytest.param(
+            _create_df(
+                [np.nan, 2.0, 3.0, np.nan], [("a", 0), ("a", 1), ("b", 1), ("c", 0)]
+            ),
+            id="float with nan",
+        ),
+        pytest.param(
+            _create_df([1.0, 2.0, 3.0], [("a", 0), ("a", 0), ("a", 1)]),
+            id="first value wins",
+        ),
+        pytest.param(
+            _create_df([np.nan, 2.0, 3.0], [("a", 0), ("a", 0), ("a", 1)]),
+            id="first non null value wins",
+        ),
+        pytest.param(
+            _create_df([True, False], [("a", 0), ("b", 1)]), id="bool with gap"
+        ),
+        pytest.param(_create_df(["x", "y"], [("a", 0), ("a", 1)]), id="object"),
+        pytest.param(
+            _create_df([np.nan, np.nan], [("a", 0), ("b", 1)]), id="all values nan"
+        ),
+        pytest.param(_create_df([], []), id="empty"),
+    ],
+)
+def test_flatten_multiindex_matches_pivot_table(df: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(flatten_multiindex(df), _pivot_flatten(df))
+
+
+def test_flatten_multiindex_matches_pivot_table_on_random_frame() -> None:
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [[f"GEN_{i}" for i in rng.permutation(200)], range(20)],
+        names=["name", "year"],
+    )
+    values = rng.random(len(index))
+    values[rng.random(len(index)) < 0.3] = np.nan
+    df = pd.DataFrame({"emission": values}, index=index).sample(
+        frac=0.8, random_state=0
+    )
+    pd.testing.assert_frame_equal(flatten_multiindex(df), _pivot_flatten(df))
@@ -0,0 +1,123 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from zefir_api.api.json_response import (
+    create_etag,
+    create_json_response,
+    encode_json,
+    encode_json_items,
+    stream_json_fragments,
+)
+
+
+class TechnologyDataResponse(BaseModel):
+    technology_name: str
+    values: list[float]
+
+
+@pytest.fixture
+def json_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/data", response_model=list[TechnologyDataResponse])
+    def get_data(request: Request, scenario_id: int = 0) -> Response:
+        return create_json_response(
+            request=request,
+            etag=create_etag(f"fingerprint_{scenario_id}", request),
+            content=lambda: encode_json(
+                list[TechnologyDataResponse],
+                [TechnologyDataResponse(technology_name="PV", values=[1.0, 2.5])],
+            ),
+        )
+
+    return TestClient(app=app)
+
+
+def test_json_response_content(json_client: TestClient) -> None:
+    response = json_client.get("/data")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == b'[{"technology_name":"PV","values":[1.0,2.5]}]'
+    assert response.headers["etag"].startswith('"')
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected_status_code",
+    (
+        pytest.param("{etag}", 304, id="same etag"),
+        pytest.param('W/{etag}, "other"', 304, id="weak etag in list"),
+        pytest.param("*", 304, id="any etag"),
+        pytest.param('"other"', 200, id="different etag"),
+    ),
+)
+def test_json_response_not_modified(
+    json_client: TestClient, if_none_match: str, expected_status_code: int
+) -> None:
+    etag = json_client.get("/data").headers["etag"]
+    response = json_client.get(
+        "/data", headers={"If-None-Match": if_none_match.format(etag=etag)}
+    )
+    assert response.status_code == expected_status_code
+    assert response.headers["etag"] == etag
+
+
+def test_json_response_etag_depends_on_fingerprint(json_client: TestClient) -> None:
+    etag = json_client.get("/data", params={"scenario_id": 0}).headers["etag"]
+    assert etag != json_client.get("/data", params={"scenario_id": 1}).headers["etag"]
+
+
+@pytest.mark.parametrize("n_items", [0, 1, 5, 6])
+def test_stream_json_fragments_matches_encode_json(n_items: int) -> None:
+    items = [
+        TechnologyDataResponse(technology_name=f"PV_{i}", values=[float(i), 2.5])
+        for i in range(n_items)
+    ]
+    fragments = encode_json_items(TechnologyDataResponse, items)
+    chunks = list(stream_json_fragments(iter(fragments), chunk_size=2))
+    assert b"".join(chunks) == encode_json(list[TechnologyDataResponse], items)
+    assert len(chunks) == (n_items + 1) // 2 + 1
+
+
+class AliasedResponse(BaseModel):
+    technology_name: str = Field(alias="technologyName")
+    values: list[float]
+
+
+def test_encode_json_matches_fastapi_response() -> None:
+    app = FastAPI()
+    item = AliasedResponse(technologyName="PV", values=[1.0])
+
+    @app.get("/data", response_model=list[AliasedResponse])
+    def get_data() -> list[AliasedResponse]:
+        return [item]
+
+    response = TestClient(app=app).get("/data")
+    assert encode_json(list[AliasedResponse], [item]) == response.content
+    assert encode_json_items(AliasedResponse, [item]) == [response.content[1:-1]]
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf")])
+def test_encode_json_rejects_non_finite_floats(value: float) -> None:
+    with pytest.raises(ValueError):
+        encode_json(
+            TechnologyDataResponse,
+            TechnologyDataResponse(technology_name="PV", values=[value]),
+        )
@@ -0,0 +1,169 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pytest
+from pytest import MonkeyPatch
+
+from zefir_api.api import map as map_module
+from zefir_api.api.config import ConfigParams
+from zefir_api.api.crud.map_handler import FEATURE_COLUMN
+from zefir_api.api.crud.map_lod import LOD_MAX_ZOOMS, get_lod_column
+from zefir_api.api.crud.map_tiles import MAP_CRS
+
+
+@pytest.fixture
+def areas_path(tmp_path: Path, monkeypatch: MonkeyPatch) -> Path:
+    (tmp_path / "city" / "map").mkdir(parents=True)
+    (tmp_path / "empty").mkdir()
+    pd.DataFrame(
+        {
+            "id": [1, 2],
+            "coordinates": [
+                json.dumps([[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]),
+                json.dumps([[[2, 0, 5], [3, 0, 5], [3, 1, 5], [2, 1, 5]]]),
+            ],
+            "buildingType": ["SF", "MF"],
+            "heatType": ["GAS", "HP"],
+        }
+    ).to_csv(tmp_path / "city" / "map" / "polygonsFeatures.csv", index=False)
+    monkeypatch.setattr(map_module, "params_config", ConfigParams(areas_path=tmp_path))
+    return tmp_path
+
+
+def test_get_map_area_names_skips_areas_without_map(areas_path: Path) -> None:
+    config = map_module.params_config
+    assert map_module.get_map_area_names(
+        config.get_polygons_file_path, config.get_polygons_cache_path
+    ) == ["city"]
+    assert (
+        map_module.get_map_area_names(
+            config.get_points_file_path, config.get_points_cache_path
+        )
+        == []
+    )
+
+
+def test_load_area_polygon_map_uses_parquet_cache(areas_path: Path) -> None:
+    gdf = map_module.load_area_polygon_map("city")
+    cache_path = areas_path / "city" / "map" / "polygonsFeatures.parquet"
+    assert cache_path.is_file()
+    assert gdf.index.to_list() == [1, 2]
+    assert "coordinates" not in gdf.columns
+    assert gdf.geometry.to_wkt().to_list() == [
+        "POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))",
+        "POLYGON ((2 0, 3 0, 3 1, 2 1, 2 0))",
+    ]
+    assert json.loads(gdf[FEATURE_COLUMN][1])["properties"] == {
+        "buildingType": "SF",
+        "heatType": "GAS",
+    }
+
+    cached = map_module.load_area_polygon_map("city")
+    pd.testing.assert_frame_equal(cached, gdf)
+
+
+def test_stale_parquet_cache_is_rebuilt(areas_path: Path) -> None:
+    map_module.load_area_polygon_map("city")
+    csv_path = areas_path / "city" / "map" / "polygonsFeatures.csv"
+    df = pd.read_csv(csv_path)
+    df["heatType"] = ["COAL", "COAL"]
+    df.to_csv(csv_path, index=False)
+    cache_mtime = (areas_path / "city" / "map" / "polygonsFeatures.parquet").stat()
+    os.utime(csv_path, ns=(cache_mtime.st_atime_ns, cache_mtime.st_mtime_ns + 1))
+    assert map_module.load_area_polygon_map("city")["heatType"].to_list() == [
+        "COAL",
+        "COAL",
+    ]
+
+
+def test_map_registry_loads_areas_lazily(areas_path: Path) -> None:
+    config = map_module.params_config
+    registry = map_module.create_map_registry(
+        map_module.get_map_area_names(
+            config.get_polygons_file_path, config.get_polygons_cache_path
+        ),
+        map_module.load_area_polygon_map,
+    )
+    assert registry.resident == []
+    assert registry.get("empty") is None
+    assert len(registry["city"]) == 2
+    assert registry.resident == ["city"]
+    assert registry.resident_bytes > 0
+
+
+def test_start_maps_preload(areas_path: Path, monkeypatch: MonkeyPatch) -> None:
+    config = map_module.params_config
+    assert map_module.start_maps_preload() is None
+
+    registry = map_module.create_map_registry(
+        map_module.get_map_area_names(
+            config.get_polygons_file_path, config.get_polygons_cache_path
+        ),
+        map_module.load_area_polygon_map,
+    )
+    monkeypatch.setattr(map_module, "map_resource", registry)
+    monkeypatch.setattr(
+        map_module, "points_resource", map_module.create_map_registry([], Mock())
+    )
+    monkeypatch.setattr(
+        map_module,
+        "params_config",
+        ConfigParams(areas_path=areas_path, preload_maps=True),
+    )
+    thread = map_module.start_maps_preload()
+    assert thread is not None
+    thread.join(timeout=30)
+    assert registry.resident == ["city"]
+
+
+def test_parquet_cache_without_lod_columns_is_rebuilt(areas_path: Path) -> None:
+    gdf = map_module.load_area_polygon_map("city")
+    cache_path = areas_path / "city" / "map" / "polygonsFeatures.parquet"
+    gdf[["buildingType", "heatType", FEATURE_COLUMN, "geometry"]].to_parquet(cache_path)
+    reloaded = map_module.load_area_polygon_map("city")
+    assert all(
+        get_lod_column(max_zoom) in reloaded.columns for max_zoom in LOD_MAX_ZOOMS
+    )
+
+
+def test_parquet_cache_in_other_crs_is_rebuilt(areas_path: Path) -> None:
+    gdf = map_module.load_area_polygon_map("city")
+    cache_path = areas_path / "city" / "map" / "polygonsFeatures.parquet"
+    gdf.set_crs("EPSG:2180", allow_override=True).to_parquet(cache_path)
+    assert map_module.load_area_polygon_map("city").crs == MAP_CRS
+
+
+def test_map_cache_write_errors_keep_parsed_layer(
+    areas_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    def to_parquet(self: gpd.GeoDataFrame, path: Path) -> None:
+        Path(path).write_bytes(b"partial")
+        raise pa.ArrowInvalid("unsupported column")
+
+    monkeypatch.setattr(gpd.GeoDataFrame, "to_parquet", to_parquet)
+    gdf = map_module.load_area_polygon_map("city")
+    assert gdf.index.to_list() == [1, 2]
+    assert sorted(path.name for path in (areas_path / "city" / "map").iterdir()) == [
+        "polygonsFeatures.csv"
+    ]
@@ -0,0 +1,265 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely import MultiPolygon, Point, Polygon, box
+
+from zefir_api.api.crud.map_handler import (
+    FEATURE_COLUMN,
+    _find_geometry_indices_in_given_geometry,
+    cluster_points,
+    create_geometry,
+    filter_points,
+    get_building_features_from_geometry,
+    get_building_ids_per_geometry,
+    get_summaries_per_geometry,
+    get_summary_from_geometry,
+    render_building_features,
+    render_point_features,
+)
+from zefir_api.api.crud.map_tiles import MAP_CRS
+from zefir_api.api.json_response import encode_json
+from zefir_api.api.parameters import PointEmission
+from zefir_api.api.payload.zefir_map import (
+    QueryFeatureCollection,
+    ZefirMapBuildingResponse,
+    ZefirMapPointResponse,
+)
+
+
+@pytest.fixture
+def buildings_gdf() -> gpd.GeoDataFrame:
+    squares = {10: (0, 0), 11: (5, 5), 12: (2, 0), 13: (9, 9), 14: (2, 2)}
+    df = pd.DataFrame(
+        {
+            "coordinates": [
+                json.dumps([[[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]])
+                for x, y in squares.values()
+            ],
+            "buildingType": ["SF", "MF", "SF", "MF", "SF"],
+            "heatType": ["GAS", "HP", "GAS", "HP", "COAL"],
+        },
+        index=pd.Index(squares, name="id"),
+    )
+    df["geometry"] = [box(x, y, x + 1, y + 1) for x, y in squares.values()]
+    df[FEATURE_COLUMN] = render_building_features(df)
+    return gpd.GeoDataFrame(df, geometry="geometry", crs=MAP_CRS)
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        pytest.param(box(-1, -1, 3.5, 3.5), id="polygon"),
+        pytest.param(box(0.5, 0.5, 6.5, 6.5), id="partially covered buildings"),
+        pytest.param(
+            MultiPolygon([box(-1, -1, 1.5, 1.5), box(8, 8, 11, 11)]), id="multipolygon"
+        ),
+        pytest.param(Polygon(), id="empty polygon"),
+    ],
+)
+def test_find_geometry_indices_matches_within(
+    buildings_gdf: gpd.GeoDataFrame, geometry: Polygon | MultiPolygon
+) -> None:
+    result = _find_geometry_indices_in_given_geometry(
+        geometry=geometry, gdf=buildings_gdf
+    )
+    expected = buildings_gdf[buildings_gdf.geometry.within(geometry)]
+    assert result.index.to_list() == expected.index.to_list()
+
+
+def test_get_building_features_from_polygon(buildings_gdf: gpd.GeoDataFrame) -> None:
+    features = get_building_features_from_geometry(
+        resource_df=buildings_gdf,
+        coordinates=[[[-1, -1], [3.5, -1], [3.5, 3.5], [-1, 3.5], [-1, -1]]],
+        geometry_type="Polygon",
+    )
+    buildings = [ZefirMapBuildingResponse.model_validate_json(f) for f in features]
+    assert [building.id for building in buildings] == [10, 12, 14]
+    assert buildings[2].properties.heatType == "COAL"
+
+
+def test_building_features_match_response_model(
+    buildings_gdf: gpd.GeoDataFrame,
+) -> None:
+    features = get_building_features_from_geometry(
+        resource_df=buildings_gdf,
+        coordinates=[[[-1, -1], [3.5, -1], [3.5, 3.5], [-1, 3.5], [-1, -1]]],
+        geometry_type="Polygon",
+    )
+    expected = ZefirMapBuildingResponse.create_polygons_from_dict(
+        coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        building_type="SF",
+        heat_type="GAS",
+        name=10,
+    )
+    assert features.index.to_list() == [10, 12, 14]
+    assert features[10] == encode_json(ZefirMapBuildingResponse, expected)
+
+
+def test_render_point_features() -> None:
+    df = pd.DataFrame(
+        {
+            "coordinates": ["[21.0, 52.2]"],
+            "buildingType": ["SF"],
+            "heatType": ["GAS"],
+            "boilerEmission": ["low"],
+            **{
+                name: [1.5]
+                for name in ["CO2", "CO", "SOX", "NOX", "Benzoapiren", "PM10", "PM25"]
+            },
+        },
+        index=pd.Index([3], name="id"),
+    )
+    [feature] = render_point_features(df)
+    point = ZefirMapPointResponse.model_validate_json(feature)
+    assert point.id == 3
+    assert point.geometry.coordinates == [21.0, 52.2]
+    assert point.properties.PM25 == 1.5
+
+
+@pytest.fixture
+def points_gdf() -> gpd.GeoDataFrame:
+    coordinates = [(21.0, 52.2), (21.0001, 52.2001), (21.1, 52.3), (21.2, 52.25)]
+    return gpd.GeoDataFrame(
+        {
+            "buildingType": ["SF", "SF", "MF", "MF"],
+            "heatType": ["GAS", "COAL", "COAL", "HP"],
+            "boilerEmission": ["low", "high", "high", "low"],
+            **{emission.value: [1.0, 2.0, 3.0, 4.0] for emission in PointEmission},
+        },
+        geometry=[Point(x, y) for x, y in coordinates],
+        index=pd.Index([1, 2, 3, 4], name="id"),
+        crs=MAP_CRS,
+    )
+
+
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    [
+        pytest.param({}, [1, 2, 3, 4], id="no filters"),
+        pytest.param({"bbox": (20.9, 52.1, 21.15, 52.35)}, [1, 2, 3], id="bbox"),
+        pytest.param({"heat_types": ["COAL", "HP"]}, [2, 3, 4], id="heat type"),
+        pytest.param(
+            {"bbox": (20.9, 52.1, 21.15, 52.35), "boiler_emissions": ["high"]},
+            [2, 3],
+            id="bbox and boiler emission",
+        ),
+        pytest.param(
+            {"emission": PointEmission.PM10, "min_emission": 2.5},
+            [3, 4],
+            id="emission threshold",
+        ),
+    ],
+)
+def test_filter_points(
+    points_gdf: gpd.GeoDataFrame, filters: dict, expected_ids: list[int]
+) -> None:
+    assert filter_points(points_gdf, **filters).index.to_list() == expected_ids
+
+
+def test_cluster_points(points_gdf: gpd.GeoDataFrame) -> None:
+    clusters = cluster_points(points_gdf, zoom=10)
+    assert sorted(cluster.properties.pointCount for cluster in clusters) == [1, 1, 2]
+    merged = next(c for c in clusters if c.properties.pointCount == 2)
+    assert merged.properties.CO2 == 3.0
+    assert merged.geometry.coordinates == pytest.approx([21.00005, 52.20005])
+    assert len(cluster_points(points_gdf, zoom=0)) == 1
+
+
+def test_cluster_points_rejects_projected_layer(points_gdf: gpd.GeoDataFrame) -> None:
+    with pytest.raises(ValueError):
+        cluster_points(points_gdf.to_crs("EPSG:2180"), zoom=10)
+
+
+def test_get_summary_from_geometry(
+    buildings_gdf: gpd.GeoDataFrame, points_gdf: gpd.GeoDataFrame
+) -> None:
+    points_gdf = points_gdf.set_geometry(
+        [Point(0.5, 0.5), Point(2.5, 0.5), Point(5.5, 5.5), Point(20, 20)]
+    )
+    summary = get_summary_from_geometry(
+        buildings_df=buildings_gdf,
+        points_df=points_gdf,
+        coordinates=[
+            [[-1.0, -1.0], [3.5, -1.0], [3.5, 3.5], [-1.0, 3.5], [-1.0, -1.0]]
+        ],
+        geometry_type="Polygon",
+    )
+    assert summary.buildingCount == 3
+    assert summary.buildingTypes == {"SF": 3}
+    assert summary.heatTypes == {"GAS": 2, "COAL": 1}
+    assert summary.pointCount == 2
+    assert summary.emissions["CO2"] == 3.0
+
+
+def test_get_building_ids_per_geometry(buildings_gdf: gpd.GeoDataFrame) -> None:
+    feature_collection = QueryFeatureCollection.model_validate(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "id": "south_west",
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [[[-1, -1], [3.5, -1], [3.5, 3.5], [-1, -1]]],
+                    },
+                },
+                {
+                    "geometry": {
+                        "type": "MultiPolygon",
+                        "coordinates": [
+                            [[[4, 4], [7, 4], [7, 7], [4, 7], [4, 4]]],
+                            [[[1.5, -1], [3.5, -1], [3.5, 1.5], [1.5, 1.5], [1.5, -1]]],
+                        ],
+                    },
+                },
+                {
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [[[50, 50], [51, 50], [51, 51], [50, 50]]],
+                    },
+                },
+            ],
+        }
+    )
+    geometries = [
+        create_geometry(feature.geometry.coordinates, feature.geometry.type)
+        for feature in feature_collection.features
+    ]
+    assert get_building_ids_per_geometry(geometries, buildings_gdf) == [
+        [12],
+        [11, 12],
+        [],
+    ]
+
+
+def test_get_summaries_per_geometry(
+    buildings_gdf: gpd.GeoDataFrame, points_gdf: gpd.GeoDataFrame
+) -> None:
+    points_gdf = points_gdf.set_geometry(
+        [Point(0.5, 0.5), Point(2.5, 0.5), Point(5.5, 5.5), Point(20, 20)]
+    )
+    geometries = [box(-1, -1, 3.5, 3.5), box(4, 4, 7, 7), box(50, 50, 51, 51)]
+    summaries = get_summaries_per_geometry(geometries, buildings_gdf, points_gdf)
+    assert [summary.buildingCount for summary in summaries] == [3, 1, 0]
+    assert summaries[1].heatTypes == {"HP": 1}
+    assert summaries[1].emissions["PM10"] == 3.0
+    assert summaries[2].buildingTypes == {}
+    assert summaries[2].emissions["CO2"] == 0.0
@@ -0,0 +1,147 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely import Polygon, box
+
+from zefir_api.api.crud.map_handler import FEATURE_COLUMN
+from zefir_api.api.crud.map_lod import (
+    LOD_MAX_ZOOMS,
+    get_lod_column,
+    get_lod_decimals,
+    get_lod_tolerance,
+    render_lod_features,
+    select_lod_column,
+)
+from zefir_api.api.crud.map_tiles import MAP_CRS
+from zefir_api.api.json_response import encode_json
+from zefir_api.api.payload.zefir_map import ZefirMapBuildingResponse
+
+
+@pytest.fixture
+def buildings_gdf() -> gpd.GeoDataFrame:
+    # outline of ~100 m with a ~3 m bump visible only at high zoom, and a building of ~1 m
+    detailed = Polygon(
+        [
+            (21.0, 52.0),
+            (21.0007, 52.0),
+            (21.00075, 52.0002),
+            (21.0007, 52.0004),
+            (21.0014, 52.0004),
+            (21.0014, 52.0009),
+            (21.0, 52.0009),
+        ]
+    )
+    tiny = box(21.01234567, 52.01234567, 21.01235567, 52.01235567)
+    return gpd.GeoDataFrame(
+        {
+            "buildingType": ["SF", "MF"],
+            "heatType": ["GAS", "HP"],
+            "geometry": [detailed, tiny],
+        },
+        index=pd.Index([7, 8], name="id"),
+        crs=MAP_CRS,
+    )
+
+
+@pytest.mark.parametrize(
+    ("zoom", "tolerance", "expected"),
+    [
+        pytest.param(None, None, FEATURE_COLUMN, id="full precision by default"),
+        pytest.param(3, None, get_lod_column(LOD_MAX_ZOOMS[0]), id="low zoom"),
+        pytest.param(
+            LOD_MAX_ZOOMS[1], None, get_lod_column(LOD_MAX_ZOOMS[1]), id="tier zoom"
+        ),
+        pytest.param(LOD_MAX_ZOOMS[-1] + 1, None, FEATURE_COLUMN, id="high zoom"),
+        pytest.param(
+            None, 1.0, get_lod_column(LOD_MAX_ZOOMS[0]), id="coarse tolerance"
+        ),
+        pytest.param(
+            None,
+            get_lod_tolerance(LOD_MAX_ZOOMS[1]) * 1.5,
+            get_lod_column(LOD_MAX_ZOOMS[1]),
+            id="tolerance between tiers",
+        ),
+        pytest.param(None, 1e-9, FEATURE_COLUMN, id="fine tolerance"),
+        pytest.param(
+            LOD_MAX_ZOOMS[-1], 1.0, get_lod_column(LOD_MAX_ZOOMS[-1]), id="zoom first"
+        ),
+    ],
+)
+def test_select_lod_column(
+    zoom: int | None, tolerance: float | None, expected: str
+) -> None:
+    assert select_lod_column(zoom=zoom, tolerance=tolerance) == expected
+
+
+def test_lod_tiers_get_finer_with_zoom() -> None:
+    tolerances = [get_lod_tolerance(max_zoom) for max_zoom in LOD_MAX_ZOOMS]
+    decimals = [get_lod_decimals(max_zoom) for max_zoom in LOD_MAX_ZOOMS]
+    assert tolerances == sorted(tolerances, reverse=True)
+    assert decimals == sorted(decimals)
+    assert all(
+        10 ** -get_lod_decimals(max_zoom) <= get_lod_tolerance(max_zoom)
+        for max_zoom in LOD_MAX_ZOOMS
+    )
+
+
+@pytest.mark.parametrize("max_zoom", LOD_MAX_ZOOMS)
+def test_render_lod_features(buildings_gdf: gpd.GeoDataFrame, max_zoom: int) -> None:
+    features = [
+        json.loads(feature) for feature in render_lod_features(buildings_gdf, max_zoom)
+    ]
+    assert [feature["id"] for feature in features] == [7, 8]
+    assert [feature["properties"] for feature in features] == [
+        {"buildingType": "SF", "heatType": "GAS"},
+        {"buildingType": "MF", "heatType": "HP"},
+    ]
+    decimals = get_lod_decimals(max_zoom)
+    for feature, original in zip(features, buildings_gdf.geometry):
+        geometry = shapely.from_geojson(json.dumps(feature["geometry"]))
+        coordinates = shapely.get_coordinates(geometry)
+        assert geometry.geom_type == "Polygon"
+        assert geometry.is_valid and not geometry.is_empty
+        np.testing.assert_array_equal(coordinates, np.round(coordinates, decimals))
+        assert geometry.hausdorff_distance(original) <= 2 * get_lod_tolerance(max_zoom)
+
+
+def test_render_lod_features_simplifies_outline(
+    buildings_gdf: gpd.GeoDataFrame,
+) -> None:
+    coarse, fine = (
+        json.loads(render_lod_features(buildings_gdf, max_zoom)[0])
+        for max_zoom in (LOD_MAX_ZOOMS[0], LOD_MAX_ZOOMS[-1])
+    )
+    assert len(coarse["geometry"]["coordinates"][0]) < len(
+        fine["geometry"]["coordinates"][0]
+    )
+
+
+def test_render_lod_features_encodes_building_response(
+    buildings_gdf: gpd.GeoDataFrame,
+) -> None:
+    buildings_gdf.index = pd.Index([7.0, 8.0], name="id")
+    features = render_lod_features(buildings_gdf, LOD_MAX_ZOOMS[0])
+    for feature in features:
+        building = ZefirMapBuildingResponse.model_validate_json(feature)
+        assert feature == encode_json(ZefirMapBuildingResponse, building)
+    assert [json.loads(feature)["id"] for feature in features] == [7, 8]
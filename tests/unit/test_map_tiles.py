@@ -0,0 +1,134 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pathlib import Path
+
+import geopandas as gpd
+import mapbox_vector_tile
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely import box
+
+from zefir_api.api.crud.map_tiles import (
+    BUILDINGS_LAYER,
+    MAP_CRS,
+    TILE_EXTENT,
+    TileCache,
+    create_buildings_tile,
+    get_tile_bounds,
+    is_valid_tile,
+    lonlat_to_mercator,
+    mercator_to_lonlat,
+)
+
+# tile 14/9153/5397 covers part of Warsaw city centre
+TILE = (14, 9153, 5397)
+
+
+@pytest.fixture
+def buildings_gdf() -> gpd.GeoDataFrame:
+    min_lon, min_lat, max_lon, max_lat = mercator_to_lonlat(
+        np.reshape(get_tile_bounds(*TILE), (2, 2))
+    ).ravel()
+    width, height = max_lon - min_lon, max_lat - min_lat
+    geometry = [
+        box(
+            min_lon + 0.1 * width,
+            min_lat + 0.1 * height,
+            min_lon + 0.2 * width,
+            min_lat + 0.2 * height,
+        ),
+        box(
+            max_lon + width, max_lat + height, max_lon + 2 * width, max_lat + 2 * height
+        ),
+    ]
+    return gpd.GeoDataFrame(
+        {"buildingType": ["SF", "MF"], "heatType": ["GAS", "HP"]},
+        geometry=geometry,
+        index=pd.Index([7, 8], name="id"),
+        crs=MAP_CRS,
+    )
+
+
+def test_mercator_round_trip() -> None:
+    coordinates = np.array([[21.0, 52.2], [-120.5, -33.3]])
+    assert np.allclose(mercator_to_lonlat(lonlat_to_mercator(coordinates)), coordinates)
+
+
+def test_lonlat_to_mercator_matches_web_mercator_crs() -> None:
+    coordinates = np.array([[21.0, 52.2], [-120.5, -33.3]])
+    expected = shapely.get_coordinates(
+        gpd.GeoSeries(shapely.points(coordinates), crs=MAP_CRS).to_crs("EPSG:3857")
+    )
+    assert np.allclose(lonlat_to_mercator(coordinates), expected)
+
+
+@pytest.mark.parametrize(
+    "tile, expected",
+    [((0, 0, 0), True), ((2, 3, 3), True), ((2, 4, 0), False), ((23, 0, 0), False)],
+)
+def test_is_valid_tile(tile: tuple[int, int, int], expected: bool) -> None:
+    assert is_valid_tile(*tile) is expected
+
+
+def test_create_buildings_tile(buildings_gdf: gpd.GeoDataFrame) -> None:
+    tile = mapbox_vector_tile.decode(create_buildings_tile(buildings_gdf, *TILE))
+    features = tile[BUILDINGS_LAYER]["features"]
+    assert [feature["id"] for feature in features] == [7]
+    assert features[0]["properties"] == {"buildingType": "SF", "heatType": "GAS"}
+    x, y = np.array(features[0]["geometry"]["coordinates"][0]).T
+    assert x.min() == pytest.approx(0.1 * TILE_EXTENT, abs=1)
+    assert y.max() == pytest.approx(0.2 * TILE_EXTENT, abs=1)
+
+
+def test_create_empty_tile(buildings_gdf: gpd.GeoDataFrame) -> None:
+    assert create_buildings_tile(buildings_gdf, 14, 0, 0) == b""
+
+
+def test_create_buildings_tile_rejects_projected_layer(
+    buildings_gdf: gpd.GeoDataFrame,
+) -> None:
+    with pytest.raises(ValueError):
+        create_buildings_tile(buildings_gdf.to_crs("EPSG:2180"), *TILE)
+
+
+def test_tile_cache_evicts_least_recently_used() -> None:
+    cache = TileCache(max_items=2)
+    created: list[int] = []
+
+    def create(y: int) -> bytes:
+        created.append(y)
+        return bytes([y])
+
+    for y in (0, 1, 0, 2, 1):
+        assert cache.get_or_create(("city", 1, 0, y), "fp", lambda: create(y)) == bytes(
+            [y]
+        )
+    assert created == [0, 1, 2, 1]
+    assert len(cache) == 2
+
+
+def test_tile_cache_reads_tiles_from_disk(tmp_path: Path) -> None:
+    TileCache(max_items=1, cache_path=tmp_path).get_or_create(
+        ("city", 1, 0, 0), "fp", lambda: b"tile"
+    )
+    cache = TileCache(max_items=1, cache_path=tmp_path)
+    assert cache.get_or_create(("city", 1, 0, 0), "fp", lambda: b"new") == b"tile"
+    assert cache.get_or_create(("city", 1, 0, 0), "other", lambda: b"new") == b"new"
+    cache.clear()
+    assert cache.get_or_create(("city", 1, 0, 0), "other", lambda: b"x") == b"new"
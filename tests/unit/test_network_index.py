@@ -0,0 +1,90 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from zefir_api.api.crud.utils import (
+    NOT_FOUND_ENERGY_TYPE,
+    NetworkIndex,
+    NotFoundInNetworkError,
+    get_mapped_generator_to_aggr,
+    get_network_index,
+)
+
+
+@pytest.fixture
+def mock_network() -> Mock:
+    network = Mock()
+    network.buses = {
+        "SF_EE_BUS": Mock(energy_type="ELECTRICITY"),
+        "SF_HEAT_BUS": Mock(energy_type="HEAT"),
+        "MF_HEAT_BUS": Mock(energy_type="HEAT"),
+        "ORPHAN_BUS": Mock(energy_type="HEAT"),
+    }
+    network.generators = {
+        "SF_HP": Mock(buses={"SF_EE_BUS", "SF_HEAT_BUS"}),
+        "MF_BOILER": Mock(buses={"MF_HEAT_BUS"}),
+        "ORPHAN": Mock(buses={"ORPHAN_BUS"}),
+    }
+    lbs_sf = Mock(buses={"ELECTRICITY": {"SF_EE_BUS"}, "HEAT": {"SF_HEAT_BUS"}})
+    lbs_sf.name = "LBS_SF"
+    lbs_mf = Mock(buses={"HEAT": {"MF_HEAT_BUS"}})
+    lbs_mf.name = "LBS_MF"
+    network.local_balancing_stacks = {"LBS_SF": lbs_sf, "LBS_MF": lbs_mf}
+    aggr_sf = Mock(available_stacks=["LBS_SF"])
+    aggr_sf.name = "SINGLE_FAMILY"
+    network.aggregated_consumers = {"SINGLE_FAMILY": aggr_sf}
+    return network
+
+
+def test_network_index_resolves_aggregate(mock_network: Mock) -> None:
+    index = NetworkIndex(mock_network)
+    assert index.get_aggregate("SF_HP", "HEAT") == "SINGLE_FAMILY"
+    assert index.get_aggregate("SF_HP", "ELECTRICITY") == "SINGLE_FAMILY"
+    assert index.get_aggregate("MF_BOILER", "ELECTRICITY") == NOT_FOUND_ENERGY_TYPE
+    assert index.lbs_aggregate == {"LBS_SF": "SINGLE_FAMILY"}
+    assert index.get_generators("SINGLE_FAMILY", "HEAT") == ["SF_HP"]
+    assert index.get_generators("MULTI_FAMILY", "HEAT") == []
+
+
+@pytest.mark.parametrize(
+    "gen_name, error",
+    [
+        pytest.param("ORPHAN", NotFoundInNetworkError, id="lbs not found"),
+        pytest.param("MF_BOILER", NotFoundInNetworkError, id="aggr not found"),
+        pytest.param("UNKNOWN", KeyError, id="generator not found"),
+    ],
+)
+def test_network_index_errors(
+    mock_network: Mock, gen_name: str, error: type[Exception]
+) -> None:
+    with pytest.raises(error):
+        NetworkIndex(mock_network).get_aggregate(gen_name, "HEAT")
+
+
+def test_get_network_index_is_built_once(mock_network: Mock) -> None:
+    assert get_network_index(mock_network) is get_network_index(mock_network)
+
+
+def test_get_mapped_generator_to_aggr(mock_network: Mock) -> None:
+    df = pd.DataFrame({2020: [1.0, 2.0]}, index=["SF_HP", "MF_BOILER"])
+    result = get_mapped_generator_to_aggr(
+        df, Mock(network=mock_network), energy_type="ELECTRICITY"
+    )
+    assert result.to_dict() == {2020: {"SINGLE_FAMILY": 1.0}}
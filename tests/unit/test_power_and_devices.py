@@ -0,0 +1,135 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from zefir_api.api.crud.power_and_devices import (
+    _get_installed_elements_per_lbs,
+    get_increasing_amount_of_devices,
+)
+from zefir_api.api.crud.utils import (
+    get_row_amount_of_device_in_agg,
+    translate_df_by_map,
+)
+from zefir_api.api.payload.zefir_data import ZefirDataResponse
+from zefir_api.api.translation import translator
+
+YEARS = [0, 1, 2, 3]
+
+
+def _capacity(values: dict[str, list[float]]) -> pd.DataFrame:
+    return pd.DataFrame(values, index=YEARS)
+
+
+@pytest.fixture
+def mock_ze() -> Mock:
+    capacities = {
+        "LBS_SF": _capacity(
+            {"HP_SF": [0.0, 1.0, 1.0, 2.0], "PV_SF": [0.0, 0.0, 3.0, 3.0]}
+        ),
+        # connected to both aggregates
+        "LBS_SHARED": _capacity(
+            {"HP_SH": [1.0, 1.0, 0.0, 1.0], "BATTERY_SH": [0.0, 2.0, 2.0, 2.0]}
+        ),
+        # no installed elements at all
+        "LBS_EMPTY": _capacity({"BOILER_E": [0.0, 0.0, 0.0, 0.0]}),
+        # not used by any aggregate
+        "LBS_UNUSED": _capacity({"HP_U": [5.0, 5.0, 5.0, 5.0]}),
+    }
+    ze = Mock()
+    ze.network.generators = {
+        name: Mock(energy_source_type=energy_source_type)
+        for name, energy_source_type in [
+            ("HP_SF", "HEAT_PUMP"),
+            ("PV_SF", "PV"),
+            ("HP_SH", "HEAT_PUMP"),
+            ("BOILER_E", "BOILER"),
+            ("HP_U", "HEAT_PUMP"),
+        ]
+    }
+    ze.network.storages = {"BATTERY_SH": Mock(energy_source_type="BATTERY")}
+    ze.lbs_params.lbs_names = list(capacities)
+    ze.lbs_params.get_lbs_capacity.side_effect = lambda lbs_names: (
+        {name: capacities[name].copy() for name in lbs_names}
+        if isinstance(lbs_names, list)
+        else capacities[lbs_names].copy()
+    )
+    ze.aggregated_consumer_params.get_fractions.return_value = {
+        "SINGLE_FAMILY": pd.DataFrame(
+            {
+                "LBS_SF": [0.1, 0.3, 0.3, 0.6],
+                "LBS_SHARED": [0.0, 0.2, 0.4, 0.4],
+                "LBS_EMPTY": [0.0, 0.1, 0.2, 0.2],
+            },
+            index=YEARS,
+        ),
+        "MULTI_FAMILY": pd.DataFrame({"LBS_SHARED": [0.5, 0.5, 0.8, 1.0]}, index=YEARS),
+    }
+    ze.aggregated_consumer_params.get_n_consumers.return_value = {
+        "SINGLE_FAMILY": pd.Series([100, 110, 120, 130], index=YEARS),
+        "MULTI_FAMILY": pd.Series([10, 20, 20, 30], index=YEARS),
+    }
+    return ze
+
+
+def _get_increasing_amount_of_devices_per_lbs(ze: Mock) -> ZefirDataResponse:
+    """Reference implementation fetching capacities per aggregate and lbs."""
+    fractions = {
+        name: df.diff().fillna(0.0).clip(lower=0.0)
+        for name, df in ze.aggregated_consumer_params.get_fractions().items()
+    }
+    device_factor = get_row_amount_of_device_in_agg(
+        fractions, ze.aggregated_consumer_params.get_n_consumers()
+    )
+    dfs = []
+    for df in device_factor.values():
+        for lbs_name in df.columns:
+            power = ze.lbs_params.get_lbs_capacity(lbs_name)
+            power.columns = [
+                (ze.network.generators | ze.network.storages)[name].energy_source_type
+                for name in power.columns
+            ]
+            dfs.append(power.mask(power != 0, df[lbs_name], axis=0))
+    device_df = pd.concat(dfs, axis=1).T.groupby(level=0).sum()
+    device_df = translate_df_by_map(
+        df=device_df, mapping_dict=translator.translated_names
+    )
+    return ZefirDataResponse.from_technology_df(df=device_df)
+
+
+def test_get_installed_elements_per_lbs(mock_ze: Mock) -> None:
+    installed = _get_installed_elements_per_lbs(mock_ze)
+    assert installed.index.to_list() == YEARS
+    assert installed[("LBS_SF", "HEAT_PUMP")].to_list() == [0, 1, 1, 1]
+    assert installed[("LBS_SF", "PV")].to_list() == [0, 0, 1, 1]
+    assert installed[("LBS_SHARED", "BATTERY")].to_list() == [0, 1, 1, 1]
+    assert installed[("LBS_EMPTY", "BOILER")].to_list() == [0, 0, 0, 0]
+    mock_ze.lbs_params.get_lbs_capacity.assert_called_once()
+
+
+def test_get_increasing_amount_of_devices_matches_per_lbs_loop(
+    mock_ze: Mock,
+) -> None:
+    expected = _get_increasing_amount_of_devices_per_lbs(mock_ze).model_dump()
+    result = get_increasing_amount_of_devices(mock_ze).model_dump()
+    assert result["years"] == expected["years"]
+    assert [tech["technology_name"] for tech in result["data"]] == [
+        tech["technology_name"] for tech in expected["data"]
+    ]
+    for tech, expected_tech in zip(result["data"], expected["data"]):
+        assert tech["values"] == pytest.approx(expected_tech["values"])
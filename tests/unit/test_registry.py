@@ -0,0 +1,133 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import signal
+import threading
+
+import pytest
+
+from zefir_api.api.registry import ResourceRegistry
+
+
+@pytest.fixture
+def loaded_keys() -> list[str]:
+    return []
+
+
+def _create_registry(
+    loaded_keys: list[str],
+    max_items: int | None = None,
+    max_bytes: int | None = None,
+    pinned: tuple[str, ...] = (),
+) -> ResourceRegistry[str, str]:
+    def loader(key: str) -> str:
+        loaded_keys.append(key)
+        return key * 10
+
+    return ResourceRegistry(
+        keys=["a", "b", "c"],
+        loader=loader,
+        sizeof=len,
+        max_items=max_items,
+        max_bytes=max_bytes,
+        pinned=pinned,
+    )
+
+
+def test_registry_loads_on_first_access(loaded_keys: list[str]) -> None:
+    registry = _create_registry(loaded_keys)
+    assert "a" in registry
+    assert "x" not in registry
+    assert registry.resident == []
+    assert registry["a"] == "a" * 10
+    assert registry["a"] == "a" * 10
+    assert loaded_keys == ["a"]
+    assert registry.resident == ["a"]
+
+
+def test_registry_unknown_key(loaded_keys: list[str]) -> None:
+    registry = _create_registry(loaded_keys)
+    with pytest.raises(KeyError):
+        registry["x"]
+    assert registry.get("x") is None
+
+
+@pytest.mark.parametrize(
+    "max_items, max_bytes",
+    (
+        pytest.param(2, None, id="count budget"),
+        pytest.param(None, 20, id="bytes budget"),
+    ),
+)
+def test_registry_evicts_least_recently_used(
+    loaded_keys: list[str], max_items: int | None, max_bytes: int | None
+) -> None:
+    registry = _create_registry(loaded_keys, max_items=max_items, max_bytes=max_bytes)
+    registry["a"]
+    registry["b"]
+    registry["a"]
+    registry["c"]
+    assert registry.resident == ["a", "c"]
+    registry["b"]
+    assert loaded_keys == ["a", "b", "c", "b"]
+
+
+def test_registry_keeps_pinned_resources(loaded_keys: list[str]) -> None:
+    registry = _create_registry(loaded_keys, max_items=1, pinned=("a",))
+    registry["a"]
+    registry["b"]
+    registry["c"]
+    assert registry.resident == ["a", "c"]
+
+
+def test_registry_reload_notifies_hooks(loaded_keys: list[str]) -> None:
+    registry = _create_registry(loaded_keys)
+    reloaded: list[str] = []
+    registry.register_reload_hook(reloaded.append)
+    registry["a"]
+    registry.reload("a")
+    assert registry.resident == []
+    assert reloaded == ["a"]
+    registry["a"]
+    assert loaded_keys == ["a", "a"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_registry_usable_after_fork_during_load() -> None:
+    parent_pid = os.getpid()
+    loading, release = threading.Event(), threading.Event()
+
+    def loader(key: str) -> str:
+        if os.getpid() == parent_pid:
+            loading.set()
+            release.wait(timeout=10)
+        return key * 10
+
+    registry: ResourceRegistry[str, str] = ResourceRegistry(keys=["a"], loader=loader)
+    thread = threading.Thread(target=registry.preload)
+    thread.start()
+    loading.wait(timeout=10)
+    # the process forks while the loading thread holds the lock of key "a"
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(5)
+        os._exit(0 if registry["a"] == "a" * 10 else 1)
+    release.set()
+    thread.join()
+    _, exit_status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(exit_status) == 0
+    assert registry["a"] == "a" * 10
@@ -0,0 +1,106 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zefir_api.api.results import drop_hourly_results, summarize_hourly_results
+
+
+@pytest.fixture
+def result_dict() -> dict[str, dict[str, dict[str, pd.DataFrame]]]:
+    hours = pd.Index(range(4), name="hour")
+    return {
+        "generators_results": {
+            "generation": {
+                "HP": pd.DataFrame({"0": [1.0, 2.0, 3.0, 4.0], "1": 1.0}, index=hours),
+                "PV": pd.DataFrame(
+                    {"0": [0.0, 5.0, np.nan, 5.0], "1": 2.0}, index=hours
+                ),
+            },
+            "generation_per_energy_type": {
+                "HP": pd.DataFrame(
+                    {
+                        "Energy Type": ["HEAT", "HEAT", "EE", "EE"],
+                        "0": [1.0, 2.0, 3.0, 4.0],
+                        "1": [0.5, 0.5, 1.0, np.nan],
+                    },
+                    index=pd.Index([0, 1, 0, 1], name="hour"),
+                ),
+                "PV": pd.DataFrame(
+                    {"Energy Type": ["EE", "EE"], "0": [2.0, 3.0], "1": [1.0, 1.0]},
+                    index=pd.Index([0, 1], name="hour"),
+                ),
+            },
+            "capacity": {"capacity": pd.DataFrame({"HP": [1.0, 2.0]})},
+        },
+        "storages_results": {"load": {}},
+    }
+
+
+def test_summarize_hourly_results(
+    result_dict: dict[str, dict[str, dict[str, pd.DataFrame]]]
+) -> None:
+    yearly_results = summarize_hourly_results(result_dict)
+    assert list(yearly_results) == ["generators_results", "storages_results"]
+    assert list(yearly_results["generators_results"]) == [
+        "generation",
+        "generation_per_energy_type",
+    ]
+    pd.testing.assert_frame_equal(
+        yearly_results["generators_results"]["generation"],
+        pd.DataFrame({"0": [10.0, 10.0], "1": [4.0, 8.0]}, index=["HP", "PV"]),
+    )
+    assert yearly_results["storages_results"]["load"].empty
+
+
+def test_summarize_hourly_results_per_energy_type(
+    result_dict: dict[str, dict[str, dict[str, pd.DataFrame]]]
+) -> None:
+    yearly_results = summarize_hourly_results(result_dict)
+    pd.testing.assert_frame_equal(
+        yearly_results["generators_results"]["generation_per_energy_type"],
+        pd.DataFrame(
+            {"0": [7.0, 3.0, 5.0], "1": [1.0, 1.0, 2.0]},
+            index=pd.MultiIndex.from_tuples(
+                [("HP", "EE"), ("HP", "HEAT"), ("PV", "EE")],
+                names=[None, "Energy Type"],
+            ),
+        ),
+    )
+
+
+def test_drop_hourly_results(
+    result_dict: dict[str, dict[str, dict[str, pd.DataFrame]]]
+) -> None:
+    drop_hourly_results(
+        result_dict, ["generators_results/generation", "lines_results/flow"]
+    )
+    assert list(result_dict["generators_results"]) == [
+        "generation_per_energy_type",
+        "capacity",
+    ]
+
+
+@pytest.mark.parametrize(
+    "family", ["generators_results/capacity", "generation", "unknown/generation"]
+)
+def test_drop_hourly_results_rejects_other_families(
+    result_dict: dict[str, dict[str, dict[str, pd.DataFrame]]], family: str
+) -> None:
+    with pytest.raises(ValueError):
+        drop_hourly_results(result_dict, [family])
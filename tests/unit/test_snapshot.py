@@ -0,0 +1,111 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pytest import MonkeyPatch
+
+from zefir_api.api.snapshot import SnapshotStore, fingerprint_paths
+
+
+def _create_result_dict() -> dict[str, dict[str, pd.DataFrame]]:
+    return {
+        "generators_results": {
+            "generation": pd.DataFrame(
+                np.arange(24.0).reshape(8, 3), columns=["GEN_1", "GEN_2", "GEN_3"]
+            ),
+            "names": pd.DataFrame({"name": ["a", "b"]}),
+        }
+    }
+
+
+def test_snapshot_round_trip(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path)
+    result_dict = _create_result_dict()
+    store.save("scenario", "fingerprint", result_dict)
+    loaded = store.load("scenario", "fingerprint")
+    for name, df in result_dict["generators_results"].items():
+        pd.testing.assert_frame_equal(loaded["generators_results"][name], df)
+    loaded["generators_results"]["generation"].iloc[0, 0] = -1.0
+    reloaded = store.load("scenario", "fingerprint")
+    assert reloaded["generators_results"]["generation"].iloc[0, 0] == 0.0
+
+
+def test_snapshot_fingerprint_mismatch(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path)
+    store.save("scenario", "fingerprint", _create_result_dict())
+    assert store.load("scenario", "other_fingerprint") is None
+    assert store.load("other_scenario", "fingerprint") is None
+
+
+def test_snapshot_load_or_create(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path / "snapshots")
+    calls: list[int] = []
+
+    def factory() -> dict[str, int]:
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert store.load_or_create("scenario", "fp", factory) == {"value": 1}
+    assert store.load_or_create("scenario", "fp", factory) == {"value": 1}
+    assert store.load_or_create("scenario", "new_fp", factory) == {"value": 2}
+    assert len(calls) == 2
+
+
+def test_fingerprint_changes_with_directory_content(tmp_path: Path) -> None:
+    (tmp_path / "results").mkdir()
+    csv_path = tmp_path / "results" / "generation.csv"
+    csv_path.write_text("hour,GEN_1\n0,1.0\n")
+    fingerprint = fingerprint_paths(tmp_path)
+    assert fingerprint == fingerprint_paths(tmp_path)
+    csv_path.write_text("hour,GEN_1\n0,1.0\n1,2.0\n")
+    assert fingerprint != fingerprint_paths(tmp_path)
+
+
+def test_snapshot_load_or_create_maps_created_data(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path)
+    created = _create_result_dict()
+    loaded = store.load_or_create("scenario", "fp", lambda: created)
+    generation = loaded["generators_results"]["generation"]
+    assert generation is not created["generators_results"]["generation"]
+    base = generation.to_numpy()
+    while isinstance(base, np.ndarray):
+        base = base.base
+    assert isinstance(base, memoryview)
+    pd.testing.assert_frame_equal(
+        generation, created["generators_results"]["generation"]
+    )
+
+
+def test_snapshot_load_or_create_recreates_truncated_snapshot(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path)
+    store.load_or_create("scenario", "fp", _create_result_dict)
+    (tmp_path / "scenario.data").write_bytes(b"")
+    loaded = store.load_or_create("scenario", "fp", _create_result_dict)
+    pd.testing.assert_frame_equal(
+        loaded["generators_results"]["generation"],
+        _create_result_dict()["generators_results"]["generation"],
+    )
+
+
+def test_snapshot_load_or_create_keeps_data_if_reload_misses(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    store = SnapshotStore(tmp_path)
+    monkeypatch.setattr(store, "load", lambda name, fingerprint: None)
+    assert store.load_or_create("scenario", "fp", lambda: {"value": 1}) == {"value": 1}
@@ -18,6 +18,7 @@ import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
 
+from zefir_api.api.config import params_config
 from zefir_api.api.crud.static_plots import _get_common_sorted_indexes
 
 
@@ -84,3 +85,18 @@ def test_static_plots(client: TestClient) -> None:
                 and all(isinstance(num, float) for num in value if value is list)
                 for value in obj.values()
             )
+
+
+def test_static_plots_etag_ignores_map_caches(client: TestClient) -> None:
+    from zefir_api.api import zefir_engine
+
+    etag = client.get("/zefir_static/get_plots").headers["etag"]
+    area = zefir_engine.area_scenario_mapping[0]
+    map_cache = params_config.get_polygons_cache_path(area.name).with_suffix(".test")
+    map_cache.write_bytes(b"cache")
+    try:
+        zefir_engine._area_fingerprints.clear()
+        assert client.get("/zefir_static/get_plots").headers["etag"] == etag
+    finally:
+        map_cache.unlink()
+        zefir_engine._area_fingerprints.clear()
@@ -0,0 +1,165 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+from functools import wraps
+from typing import Any, Callable, Generic, Hashable, TypeVar
+from weakref import WeakKeyDictionary
+
+import numpy as np
+import pandas as pd
+
+T = TypeVar("T")
+ObjT = TypeVar("ObjT")
+
+
+class ResponseCache(Generic[T]):
+    """
+    Thread safe cache of computed responses, grouped by scenario id so all responses of
+    one scenario can be invalidated when its data is reloaded.
+    """
+
+    def __init__(self) -> None:
+        self._responses: dict[tuple[int, Hashable], T] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __contains__(self, key: tuple[int, Hashable]) -> bool:
+        return key in self._responses
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def get_or_compute(
+        self, scenario_id: int, key: Hashable, compute: Callable[[], T]
+    ) -> T:
+        with self._lock:
+            if (scenario_id, key) in self._responses:
+                self._hits += 1
+                return self._responses[(scenario_id, key)]
+            self._misses += 1
+        response = compute()
+        with self._lock:
+            return self._responses.setdefault((scenario_id, key), response)
+
+    def invalidate(self, scenario_id: int | None = None) -> None:
+        with self._lock:
+            if scenario_id is None:
+                self._responses.clear()
+            else:
+                for key in [key for key in self._responses if key[0] == scenario_id]:
+                    del self._responses[key]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._responses),
+            }
+
+
+def cache_per_object(func: Callable[[ObjT], T]) -> Callable[[ObjT], T]:
+    """
+    Caches the result of a single argument function for as long as the argument object lives,
+    e.g. structures derived from a ZefirEngine or its Network are dropped with the evicted engine.
+    """
+    results: WeakKeyDictionary[Any, T] = WeakKeyDictionary()
+    lock = threading.Lock()
+
+    @wraps(func)
+    def cached(obj: ObjT) -> T:
+        with lock:
+            if obj in results:
+                return results[obj]
+        result = func(obj)
+        with lock:
+            return results.setdefault(obj, result)
+
+    return cached
+
+
+def _to_hashable(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_to_hashable(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_to_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _to_hashable(item)) for key, item in value.items()))
+    hash(value)
+    return value
+
+
+def _freeze(value: Any) -> Any:
+    """Returns a copy of value with all numpy buffers marked as read-only."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        value = value.copy(deep=True)
+        for array in value._mgr.arrays:
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+        return value
+    if isinstance(value, dict):
+        return {key: _freeze(item) for key, item in value.items()}
+    return value
+
+
+def _share(value: Any) -> Any:
+    """Returns a view of frozen value whose index and columns can be replaced by the caller."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: _share(item) for key, item in value.items()}
+    return value
+
+
+class MemoizedQuery:
+    """
+    Proxy of a zefir_analytics query object (e.g. ZefirEngine.source_params) which caches
+    results of its public methods by method name and arguments.
+
+    Cached frames are read-only, every call gets its own shallow copy of them, so callers may
+    rename or reindex the result, but an attempt to modify its values raises ValueError instead
+    of corrupting the results shared with other handlers.
+    """
+
+    def __init__(self, query: Any) -> None:
+        self._query = query
+        self._results: dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attribute = getattr(self._query, name)
+        if not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def memoized(*args: Any, **kwargs: Any) -> Any:
+            try:
+                key = (name, _to_hashable(args), _to_hashable(kwargs))
+            except TypeError:
+                return attribute(*args, **kwargs)
+            with self._lock:
+                if key in self._results:
+                    return _share(self._results[key])
+            result = _freeze(attribute(*args, **kwargs))
+            with self._lock:
+                return _share(self._results.setdefault(key, result))
+
+        return memoized
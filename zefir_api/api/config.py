@@ -18,7 +18,7 @@ import configparser
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Final
+from typing import Any, Callable, Final
 
 from zefir_api.api.utils import get_resources
 
@@ -33,6 +33,8 @@ class ConfigParams:
     translate_fuels_path: Path = get_resources("translation/fuel_translation.json")
     translate_lbs_path: Path = get_resources("translation/lbs_translation.json")
     translate_energy_path: Path = get_resources("translation/energy_translation.json")
+    snapshot_path: Path | None = None
+    tile_cache_path: Path | None = None
     tags_to_drop: list[str] = field(
         default_factory=lambda: ["KSE", "KSE_CONN", "HD_CONN"]
     )
@@ -42,6 +44,20 @@ class ConfigParams:
     usage_ee_name: str = "EE"
     usage_heat_name: str = "HEAT"
     usage_cold_name: str = "COLD"
+    lazy_engines: bool = True
+    engine_workers: int = 1
+    share_engine_memory: bool = False
+    max_loaded_engines: int | None = None
+    max_engines_bytes: int | None = None
+    pinned_scenarios: list[int] = field(default_factory=list)
+    warm_response_cache: bool = False
+    map_cache: bool = True
+    tile_cache_size: int = 4096
+    points_cluster_max_zoom: int = 14
+    preload_maps: bool = False
+    max_loaded_maps: int | None = None
+    max_maps_bytes: int | None = None
+    drop_hourly_results: list[str] = field(default_factory=list)
 
     def get_source_path(self, area: str) -> Path:
         return self.areas_path / area / "source_csv"
@@ -67,6 +83,12 @@ class ConfigParams:
     def get_points_file_path(self, area: str) -> Path:
         return self.areas_path / area / "map/pointsFeatures.csv"
 
+    def get_polygons_cache_path(self, area: str) -> Path:
+        return self.areas_path / area / "map/polygonsFeatures.parquet"
+
+    def get_points_cache_path(self, area: str) -> Path:
+        return self.areas_path / area / "map/pointsFeatures.parquet"
+
     def get_plots_path(self, area: str) -> Path:
         return self.areas_path / area / "static_data/static_plots"
 
@@ -77,7 +99,47 @@ class ConfigParams:
         return self.areas_path / area / "transport"
 
 
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _to_int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split("-") if item.strip()]
+
+
+def _to_str_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split("-") if item.strip()]
+
+
+_optimization_converters: Final[dict[str, Callable[[str], Any]]] = {
+    "lazy_engines": _to_bool,
+    "engine_workers": int,
+    "share_engine_memory": _to_bool,
+    "max_loaded_engines": int,
+    "max_engines_bytes": int,
+    "pinned_scenarios": _to_int_list,
+    "warm_response_cache": _to_bool,
+    "map_cache": _to_bool,
+    "tile_cache_size": int,
+    "points_cluster_max_zoom": int,
+    "preload_maps": _to_bool,
+    "max_loaded_maps": int,
+    "max_maps_bytes": int,
+    "drop_hourly_results": _to_str_list,
+}
+
+
 class ConfigParser:
+    @staticmethod
+    def _parse_value(section: str, key: str, value: str) -> Any:
+        if section == "paths":
+            return Path(value)
+        if section == "tags":
+            return value.split("-")
+        if section == "optimization":
+            return _optimization_converters.get(key, str)(value)
+        return value
+
     @staticmethod
     def load_config(config_file_path: str | None = None) -> ConfigParams:
         if config_file_path is None:
@@ -88,14 +150,7 @@ class ConfigParser:
         for section in ["names", "paths", "tags", "optimization"]:
             if config.has_section(section):
                 config_dict.update(
-                    (
-                        key,
-                        (
-                            Path(value)
-                            if section == "paths"
-                            else value.split("-") if section == "tags" else value
-                        ),
-                    )
+                    (key, ConfigParser._parse_value(section, key, value))
                     for key, value in config.items(section)
                 )
         return ConfigParams(**config_dict)
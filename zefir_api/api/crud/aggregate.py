@@ -18,9 +18,11 @@ import pandas as pd
 from pyzefir.model.network import AggregatedConsumer, Network
 from zefir_analytics import ZefirEngine
 
+from zefir_api.api.cache import cache_per_object
 from zefir_api.api.crud.utils import (
     flatten_multiindex,
-    get_aggr_by_generator_name,
+    get_aggregate_matrices,
+    get_mapped_generator_to_aggr,
     get_row_amount_of_device_in_agg,
 )
 from zefir_api.api.parameters import AggregateType, ConsumptionType
@@ -44,17 +46,29 @@ def _filter_by_agg_type(
     ]
 
 
-def _filter_by_consumption_type(
-    aggregates: list[AggregatedConsumer],
-) -> dict[str, list[AggregatedConsumer]]:
-    consumption_dict: dict[str, list[AggregatedConsumer]] = {
-        member.name: [] for member in ConsumptionType
+def _classify_aggregates(
+    ze: ZefirEngine,
+) -> dict[AggregateType, dict[str, list[AggregatedConsumer]]]:
+    """Groups aggregated consumers by AggregateType name prefix and ConsumptionType in one pass."""
+    classified: dict[AggregateType, dict[str, list[AggregatedConsumer]]] = {
+        aggregate_type: {member.name: [] for member in ConsumptionType}
+        for aggregate_type in AggregateType
     }
-    for agg in aggregates:
+    for agg_name, agg in ze.network.aggregated_consumers.items():
+        aggregate_type = next(
+            (
+                aggregate_type
+                for aggregate_type in AggregateType
+                if agg_name.startswith(aggregate_type.value.upper())
+            ),
+            None,
+        )
+        if aggregate_type is None:
+            continue
         for member in ConsumptionType:
-            if member.value in agg.name:
-                consumption_dict[member.name].append(agg)
-    return consumption_dict
+            if member.value in agg_name:
+                classified[aggregate_type][member.name].append(agg)
+    return classified
 
 
 def _get_area_data(
@@ -74,71 +88,60 @@ def _get_area_data(
     return area_objects_list
 
 
+@cache_per_object
+def _get_aggregate_generation_demand(ze: ZefirEngine) -> dict[str, pd.DataFrame]:
+    """Generation demand per energy type as aggregate x year frames, summed over generators."""
+    gen_demand = ze.source_params.get_generation_demand(level="element").dropna()
+    return {
+        en_type: get_mapped_generator_to_aggr(
+            flatten_multiindex(gen_demand[[en_type]]), ze=ze, energy_type=en_type
+        )
+        for en_type in gen_demand.columns
+    }
+
+
 def _get_usage_per_building(
     ze: ZefirEngine,
-    aggregates: list[AggregatedConsumer],
-    gen_demand: pd.DataFrame,
+    agg_names: list[str],
     year_sample_len: int,
 ) -> list[UsagePerBuildingData]:
-    energy_result_dict: dict[str, pd.Series] = {}
-    for agg in aggregates:
-        for en_type, energy_usage in agg.yearly_energy_usage.items():
-            gen_demand_values = None
-            if en_type in gen_demand:
-                demand_df = flatten_multiindex(gen_demand[[en_type]])
-                demand_df = demand_df.rename(
-                    {
-                        name: get_aggr_by_generator_name(
-                            gen_name=name, ze=ze, energy_type=en_type
-                        )
-                        for name in demand_df.index
-                    }
-                )
-                if agg.name in demand_df.index:
-                    gen_demand_values = demand_df.loc[agg.name]
-            energy_usage = energy_usage * agg.n_consumers
-            summed_energy_usage = (
-                (energy_usage + gen_demand_values)
-                if gen_demand_values is not None
-                else energy_usage
+    matrices = get_aggregate_matrices(ze.network)
+    aggregate_demand = _get_aggregate_generation_demand(ze)
+    # energy types in order of their first use among the selected aggregates
+    energy_types = dict.fromkeys(
+        en_type for agg_name in agg_names for en_type in matrices.energy_types[agg_name]
+    )
+    usage_per_building: list[UsagePerBuildingData] = []
+    for en_type in energy_types:
+        usage_df = matrices.get_yearly_usage(en_type, agg_names)
+        values = usage_df.sum(axis=0, skipna=False)
+        if (demand_df := aggregate_demand.get(en_type)) is not None:
+            demand_df = demand_df.loc[
+                demand_df.index.intersection(usage_df.index, sort=False)
+            ]
+            if not demand_df.empty:
+                values = values + demand_df.sum(axis=0, skipna=False)
+        usage_per_building.append(
+            UsagePerBuildingData(
+                energy_type=translator.translated_energy.get(en_type, en_type),
+                values=values[:year_sample_len].to_list(),
             )
-            summed_energy_usage = summed_energy_usage[:year_sample_len]
-            if en_type in energy_result_dict:
-                energy_result_dict[en_type] = (
-                    energy_result_dict[en_type] + summed_energy_usage
-                )
-            else:
-                energy_result_dict[en_type] = summed_energy_usage
-
-    return [
-        UsagePerBuildingData(
-            energy_type=translator.translated_energy.get(en_type, en_type),
-            values=values.to_list(),
         )
-        for en_type, values in energy_result_dict.items()
-    ]
+    return usage_per_building
 
 
 def _get_total_area_and_buildings_in_agg_type(
-    aggregates: list[AggregatedConsumer], year_sample_len: int
+    ze: ZefirEngine, agg_names: list[str], year_sample_len: int
 ) -> tuple[list[float], list[int]]:
-    total_values: dict[str, pd.Series] = {}
-    if not aggregates:
+    if not agg_names:
         return [], []
-    for agg in aggregates:
-        totals = {
-            "buildings": agg.n_consumers[:year_sample_len],
-            "area": agg.n_consumers[:year_sample_len] * agg.average_area,
-        }
-        for attr in totals:
-            if attr in total_values:
-                total_values[attr] = total_values[attr] + totals[attr]
-            else:
-                total_values[attr] = totals[attr]
-
+    matrices = get_aggregate_matrices(ze.network)
+    n_consumers = matrices.n_consumers.loc[agg_names].iloc[:, :year_sample_len]
     return (
-        total_values["area"].to_list(),
-        total_values["buildings"].to_list(),
+        n_consumers.mul(matrices.average_area.loc[agg_names], axis=0)
+        .sum(axis=0, skipna=False)
+        .to_list(),
+        n_consumers.sum(axis=0, skipna=False).to_list(),
     )
 
 
@@ -159,16 +162,13 @@ def get_agg_totals(
     ys_len = len(ze._year_sample)
     aggregates = _filter_by_agg_type(ze=ze, aggregate_type=aggregate_type)
     if aggregates:
-        total_amount_of_buildings = (
-            pd.concat([agg.n_consumers for agg in aggregates], axis=1)
-            .sum(axis=1)
-            .tolist()
-        )[:ys_len]
+        matrices = get_aggregate_matrices(ze.network)
+        agg_names = [agg.name for agg in aggregates]
+        n_consumers = matrices.n_consumers.loc[agg_names]
+        total_amount_of_buildings = n_consumers.sum(axis=0).tolist()[:ys_len]
         total_usable_area = (
-            pd.concat(
-                [agg.n_consumers * agg.average_area for agg in aggregates], axis=1
-            )
-            .sum(axis=1)
+            n_consumers.mul(matrices.average_area.loc[agg_names], axis=0)
+            .sum(axis=0)
             .tolist()
         )[:ys_len]
         return ZefirAggregateTotals(
@@ -207,31 +207,44 @@ def get_stacks_info(
     return stacks_list
 
 
-def get_details(
-    ze: ZefirEngine, aggregate_type: AggregateType
-) -> list[ZefirAggregateDetail]:
-    details_object_list: list[ZefirAggregateDetail] = []
-    aggregates = _filter_by_agg_type(ze=ze, aggregate_type=aggregate_type)
-    agg_consumption_filtered = _filter_by_consumption_type(aggregates)
+@cache_per_object
+def _get_details_per_aggregate_type(
+    ze: ZefirEngine,
+) -> dict[AggregateType, list[ZefirAggregateDetail]]:
+    """
+    Computes details of all aggregate types at once, so the engine parameters
+    are read once per scenario instead of once per type.
+    """
     fractions = ze.aggregated_consumer_params.get_fractions()
     n_consumers = ze.aggregated_consumer_params.get_n_consumers()
     fraction_consumers = get_row_amount_of_device_in_agg(fractions, n_consumers)
-    gen_demand = ze.source_params.get_generation_demand(level="element").dropna()
     ys_len = len(ze._year_sample)
 
-    for consumption_type, agg_list in agg_consumption_filtered.items():
-        area = _get_area_data(agg_list, fraction_consumers)
-        usage_per_building = _get_usage_per_building(ze, agg_list, gen_demand, ys_len)
-        total_agg_area, total_agg_building = _get_total_area_and_buildings_in_agg_type(
-            agg_list, ys_len
-        )
-        details_object_list.append(
-            ZefirAggregateDetail(
-                name=consumption_type,
-                area=area,
-                energy_per_building=usage_per_building,
-                agg_area=total_agg_area,
-                agg_amount_of_building=total_agg_building,
+    details: dict[AggregateType, list[ZefirAggregateDetail]] = {}
+    for aggregate_type, agg_consumption in _classify_aggregates(ze).items():
+        details_object_list: list[ZefirAggregateDetail] = []
+        for consumption_type, agg_list in agg_consumption.items():
+            agg_names = [agg.name for agg in agg_list]
+            area = _get_area_data(agg_list, fraction_consumers)
+            usage_per_building = _get_usage_per_building(ze, agg_names, ys_len)
+            (
+                total_agg_area,
+                total_agg_building,
+            ) = _get_total_area_and_buildings_in_agg_type(ze, agg_names, ys_len)
+            details_object_list.append(
+                ZefirAggregateDetail(
+                    name=consumption_type,
+                    area=area,
+                    energy_per_building=usage_per_building,
+                    agg_area=total_agg_area,
+                    agg_amount_of_building=total_agg_building,
+                )
             )
-        )
-    return details_object_list
+        details[aggregate_type] = details_object_list
+    return details
+
+
+def get_details(
+    ze: ZefirEngine, aggregate_type: AggregateType
+) -> list[ZefirAggregateDetail]:
+    return _get_details_per_aggregate_type(ze)[aggregate_type]
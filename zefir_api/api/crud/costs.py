@@ -17,8 +17,10 @@
 from collections import defaultdict
 
 import pandas as pd
+from pyzefir.model.network import Network
 from zefir_analytics import ZefirEngine
 
+from zefir_api.api.cache import cache_per_object
 from zefir_api.api.crud.utils import (
     flatten_multiindex,
     filter_generators_by_tag,
@@ -30,6 +32,28 @@ from zefir_api.api.transport_loader import transport_holder
 from zefir_api.api.zefir_engine import get_scenario_id
 
 
+@cache_per_object
+def _get_generator_emission_fees(network: Network) -> dict[str, pd.Series]:
+    """
+    Maps generators to the emission fee charged per emission type,
+    if a generator has several fees of the same emission type the first one by name is used.
+    """
+    fees_per_type: dict[str, set[str]] = defaultdict(set)
+    for fee in network.emission_fees.values():
+        fees_per_type[fee.emission_type].add(fee.name)
+    return {
+        emission_type: pd.Series(
+            {
+                gen_name: min(common_fees)
+                for gen_name, gen in network.generators.items()
+                if (common_fees := fee_names.intersection(gen.emission_fee or ()))
+            },
+            dtype=object,
+        )
+        for emission_type, fee_names in fees_per_type.items()
+    }
+
+
 def _calculate_ets_emission_costs(
     ze: ZefirEngine, emissions_df: pd.DataFrame, years: list[int]
 ) -> dict[str, pd.DataFrame]:
@@ -37,24 +61,17 @@ def _calculate_ets_emission_costs(
         emission_name: flatten_multiindex(emissions_df[[emission_name]])
         for emission_name in emissions_df.columns
     }
-    ets_fee_dict: dict[str, dict] = defaultdict(dict)
-    for ets in ze.network.emission_fees.values():
-        ets_fee_dict[ets.emission_type][ets.name] = ets.price.loc[years].T
-    if not ets_fee_dict:
+    if not ze.network.emission_fees:
         return {}
-    ets_fee_dict = dict(ets_fee_dict)
+    fee_prices = pd.DataFrame(
+        {ets.name: ets.price.loc[years] for ets in ze.network.emission_fees.values()}
+    ).T
+    generator_fees = _get_generator_emission_fees(ze.network)
     for et, df in emissions_dict.items():
-        if et in ets_fee_dict:
-            emission_fees_per_et = set(ets_fee_dict[et].keys())
-            for gen_name in df.index:
-                gen_ef = ze.network.generators[gen_name].emission_fee
-                common_gen_ef = emission_fees_per_et.intersection(gen_ef)
-                if not gen_ef or not common_gen_ef:
-                    df = df.drop(gen_name)
-                else:
-                    ets_df = ets_fee_dict[et][common_gen_ef.pop()].to_list()
-                    df.loc[[gen_name]] = df.loc[[gen_name]].mul(ets_df)
-            emissions_dict[et] = df
+        if et in generator_fees:
+            gen_fee = generator_fees[et].reindex(df.index).dropna()
+            prices = fee_prices.loc[gen_fee.to_numpy(), df.columns].to_numpy()
+            emissions_dict[et] = df.loc[gen_fee.index] * prices
     return emissions_dict
 
 
@@ -13,14 +13,15 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-import numpy as np
 import pandas as pd
 from zefir_analytics import ZefirEngine
 
 from zefir_api.api.config import params_config
 from zefir_api.api.crud.utils import (
     flatten_multiindex,
+    get_aggregate_matrices,
     get_mapped_generator_to_aggr,
+    get_yearly_results,
     filter_generators_by_tag,
 )
 from zefir_api.api.parameters import AggregateType
@@ -30,15 +31,7 @@ from zefir_api.api.payload.zefir_data import ZefirDataResponse
 def _get_aggregate_consumer_factor(
     ze: ZefirEngine, years: list[int], energy_type: str
 ) -> pd.DataFrame:
-    factor_df = pd.DataFrame()
-    network = ze.network
-    for aggr in network.aggregated_consumers.values():
-        year_usage = aggr.yearly_energy_usage[energy_type].loc[years]
-        n_cons = aggr.n_consumers.loc[years]
-        factor_df[aggr.name] = year_usage * n_cons
-    factor_df = factor_df.T
-    factor_df.columns = [col for col in factor_df.columns]
-    return factor_df
+    return get_aggregate_matrices(ze.network).get_yearly_usage(energy_type)[years]
 
 
 def _map_agg_name_to_agg_type(df: pd.DataFrame) -> pd.DataFrame:
@@ -66,13 +59,11 @@ def _get_energy_type_usage(ze: ZefirEngine, energy_type: str) -> ZefirDataRespon
     df = flatten_multiindex(df=df)
     df = get_mapped_generator_to_aggr(df=df, ze=ze, energy_type=energy_type)
     filtered_factor_df = factor_df.loc[factor_df.index.isin(df.index)]
-    series_list = []
-    for t in filter_generators_by_tag(ze=ze, tags=["thermo"]):
-        series = ze.result_dict["generators_results"]["generation"][t.name].sum()
-        series.name = t.name
-        series_list.append(series)
-    df_tech = pd.concat(series_list, axis=1).T
-    df_tech.columns = df_tech.columns.astype(np.integer)
+    thermo_names = [t.name for t in filter_generators_by_tag(ze=ze, tags=["thermo"])]
+    df_tech = get_yearly_results(ze)["generators_results"]["generation"].loc[
+        thermo_names
+    ]
+    df_tech.columns = df_tech.columns.astype(int)
     df_tech = get_mapped_generator_to_aggr(df=df_tech, ze=ze, energy_type=energy_type)
     summed_df = df + filtered_factor_df - df_tech
     summed_df = _map_agg_name_to_agg_type(summed_df)
@@ -14,19 +14,37 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Literal, overload
+import json
+from typing import Final, Literal, overload
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-from shapely import MultiPolygon, Polygon
+import shapely
+from shapely import MultiPolygon, Polygon, box
 from shapely.geometry.base import BaseGeometry
 
+from zefir_api.api.crud.map_tiles import (
+    TILE_PIXELS,
+    check_map_crs,
+    get_tile_bounds,
+    lonlat_to_mercator,
+)
+from zefir_api.api.json_response import encode_json_items
+from zefir_api.api.parameters import PointEmission
 from zefir_api.api.payload.zefir_map import (
+    ClusterProperties,
+    PointGeometry,
     PolygonCoordinates,
     ZefirMapBuildingResponse,
+    ZefirMapClusterResponse,
     ZefirMapPointResponse,
+    ZefirMapSummaryResponse,
 )
 
+FEATURE_COLUMN: Final[str] = "feature"
+CLUSTER_CELL_PIXELS: Final[int] = 64
+
 
 def _find_geometry_indices_in_given_geometry(
     geometry: BaseGeometry, gdf: gpd.GeoDataFrame
@@ -42,81 +60,284 @@ def _find_geometry_indices_in_given_geometry(
     gpd.GeoDataFrame: Filtered gdf containing geometries within the bounding box
 
     The method performs the following steps:
-    1. Determines which geometries from the GeoDataFrame fall within the bounding box.
-    2. Returns a GeoDataFrame containing geometries within the specified bounding box.
+    1. Selects candidates whose bounding boxes intersect the geometry using the spatial index.
+    2. Keeps candidates contained by the prepared geometry, preserving gdf row order.
     """
-    return gdf[gdf.geometry.within(geometry)]
+    positions = gdf.sindex.query(geometry, predicate="contains")
+    return gdf.iloc[np.sort(positions)]
+
+
+def create_geometry(
+    coordinates: PolygonCoordinates | list[PolygonCoordinates],
+    geometry_type: Literal["Polygon", "MultiPolygon"],
+) -> BaseGeometry:
+    if geometry_type == "Polygon":
+        return Polygon(*coordinates)
+    return MultiPolygon(coordinates)
+
+
+def render_building_features(df: pd.DataFrame) -> list[bytes]:
+    """Encodes every building of the map layer as GeoJSON Feature, once at load time."""
+    return encode_json_items(
+        ZefirMapBuildingResponse,
+        (
+            ZefirMapBuildingResponse.create_polygons_from_dict(
+                coordinates=json.loads(coordinates),
+                building_type=building_type,
+                heat_type=heat_type,
+                name=id,
+            )
+            for id, coordinates, building_type, heat_type in zip(
+                df.index, df["coordinates"], df["buildingType"], df["heatType"]
+            )
+        ),
+    )
+
+
+def render_point_features(df: pd.DataFrame) -> list[bytes]:
+    """Encodes every point of the map layer as GeoJSON Feature, once at load time."""
+    return encode_json_items(
+        ZefirMapPointResponse,
+        (
+            ZefirMapPointResponse.create_points_from_dict(
+                coordinates=json.loads(data.coordinates),
+                building_type=data.buildingType,
+                heat_type=data.heatType,
+                name=data.Index,
+                boilerEmission=data.boilerEmission,
+                CO2=data.CO2,
+                CO=data.CO,
+                SOX=data.SOX,
+                NOX=data.NOX,
+                Benzoapiren=data.Benzoapiren,
+                PM10=data.PM10,
+                PM25=data.PM25,
+            )
+            for data in df.itertuples()
+        ),
+    )
 
 
 @overload
-def get_buildings_from_geometry(
+def get_building_features_from_geometry(
     resource_df: gpd.GeoDataFrame,
     coordinates: PolygonCoordinates,
     geometry_type: Literal["Polygon"],
-) -> list[ZefirMapBuildingResponse]:
+    feature_column: str = ...,
+) -> pd.Series:
     pass
 
 
 @overload
-def get_buildings_from_geometry(
+def get_building_features_from_geometry(
     resource_df: gpd.GeoDataFrame,
     coordinates: list[PolygonCoordinates],
     geometry_type: Literal["MultiPolygon"],
-) -> list[ZefirMapBuildingResponse]:
+    feature_column: str = ...,
+) -> pd.Series:
     pass
 
 
-def get_buildings_from_geometry(
+def get_building_features_from_geometry(
     resource_df: gpd.GeoDataFrame,
     coordinates: PolygonCoordinates | list[PolygonCoordinates],
     geometry_type: Literal["Polygon", "MultiPolygon"],
-) -> list[ZefirMapBuildingResponse]:
+    feature_column: str = FEATURE_COLUMN,
+) -> pd.Series:
     """
-    Retrieves buildings from a DataFrame filtered by a specified polygon.
+    Retrieves pre-rendered GeoJSON features of buildings within a specified polygon.
 
     Parameters:
     - resource_df (gpd.GeoDataFrame): GeoDataFrame containing geographical resources.
-    - coordinates (list): Bounding box coordinates in the form of [min_x, min_y, max_x, max_y].
-    - geometry_type (list): Bounding box coordinates in the form of [min_x, min_y, max_x, max_y].
+    - coordinates (list): Polygon or MultiPolygon coordinates.
+    - geometry_type (str): type of the geometry given by coordinates.
+    - feature_column (str): column with features of the requested level of detail.
 
     Returns:
-    list: A list of ZefirMapResponse objects created from the filtered DataFrame.
+    pd.Series: encoded ZefirMapBuildingResponse of every matched building.
     """
-    if geometry_type == "Polygon":
-        geometry = Polygon(*coordinates)
-    else:
-        geometry = MultiPolygon(coordinates)
-
     filtered_df = _find_geometry_indices_in_given_geometry(
-        geometry=geometry, gdf=resource_df
+        geometry=create_geometry(coordinates, geometry_type), gdf=resource_df
     )
+    return filtered_df[feature_column]
+
 
+def filter_points(
+    resource_df: gpd.GeoDataFrame,
+    bbox: tuple[float, float, float, float] | None = None,
+    heat_types: list[str] | None = None,
+    boiler_emissions: list[str] | None = None,
+    emission: PointEmission | None = None,
+    min_emission: float | None = None,
+) -> gpd.GeoDataFrame:
+    """
+    Filters points of the map layer.
+
+    Parameters:
+    - resource_df (gpd.GeoDataFrame): points layer with spatial index.
+    - bbox (tuple | None): (min_lon, min_lat, max_lon, max_lat), selected through the spatial index.
+    - heat_types (list | None): allowed heatType values.
+    - boiler_emissions (list | None): allowed boilerEmission values.
+    - emission (PointEmission | None): emission compared with min_emission.
+    - min_emission (float | None): minimal value of the emission.
+
+    Returns:
+    gpd.GeoDataFrame: matching points in layer order.
+    """
+    df = resource_df
+    if bbox is not None:
+        positions = df.sindex.query(box(*bbox), predicate="intersects")
+        df = df.iloc[np.sort(positions)]
+    mask = np.ones(len(df), dtype=bool)
+    if heat_types:
+        mask &= df["heatType"].isin(heat_types).to_numpy()
+    if boiler_emissions:
+        mask &= df["boilerEmission"].isin(boiler_emissions).to_numpy()
+    if emission is not None and min_emission is not None:
+        mask &= (df[emission.value] >= min_emission).to_numpy()
+    return df[mask]
+
+
+def cluster_points(df: gpd.GeoDataFrame, zoom: int) -> list[ZefirMapClusterResponse]:
+    """
+    Groups points into grid cells of CLUSTER_CELL_PIXELS screen pixels at given zoom.
+    Every cluster is placed in the mean position of its points and holds summed emissions.
+    """
+    check_map_crs(df)
+    emissions = [emission.value for emission in PointEmission]
+    coordinates = shapely.get_coordinates(df.geometry.to_numpy())
+    min_x, _, max_x, _ = get_tile_bounds(zoom, 0, 0)
+    cell_size = (max_x - min_x) * CLUSTER_CELL_PIXELS / TILE_PIXELS
+    cells = np.floor(lonlat_to_mercator(coordinates) / cell_size).astype(np.int64)
+    points = pd.DataFrame(
+        {
+            "cell_x": cells[:, 0],
+            "cell_y": cells[:, 1],
+            "lon": coordinates[:, 0],
+            "lat": coordinates[:, 1],
+            **{emission: df[emission].to_numpy() for emission in emissions},
+        }
+    )
+    clusters = points.groupby(["cell_x", "cell_y"]).agg(
+        lon=("lon", "mean"),
+        lat=("lat", "mean"),
+        pointCount=("lon", "size"),
+        **{emission: (emission, "sum") for emission in emissions},
+    )
     return [
-        ZefirMapBuildingResponse.create_polygons_from_dict(
-            coordinates=data["coordinates"],
-            building_type=data["buildingType"],
-            heat_type=data["heatType"],
-            name=id,
+        ZefirMapClusterResponse(
+            id=f"{zoom}/{cell_x}/{cell_y}",
+            geometry=PointGeometry(coordinates=[cluster["lon"], cluster["lat"]]),
+            properties=ClusterProperties(
+                pointCount=int(cluster["pointCount"]),
+                **{emission: cluster[emission] for emission in emissions},
+            ),
         )
-        for id, data in filtered_df.to_dict("index").items()
+        for (cell_x, cell_y), cluster in clusters.iterrows()
     ]
 
 
-def get_points(resource_df: pd.DataFrame) -> list[ZefirMapPointResponse]:
+def _join_geometries(
+    geometries: list[BaseGeometry], gdf: gpd.GeoDataFrame
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Spatial join of query geometries with the layer in one spatial index query.
+
+    Returns:
+    tuple: positions of query geometries and positions of gdf rows within them,
+    sorted by query geometry and then by gdf row.
+    """
+    queries, positions = gdf.sindex.query(
+        np.asarray(geometries, dtype=object), predicate="contains"
+    )
+    order = np.lexsort((positions, queries))
+    return queries[order], positions[order]
+
+
+def get_building_ids_per_geometry(
+    geometries: list[BaseGeometry], buildings_df: gpd.GeoDataFrame
+) -> list[list[int]]:
+    queries, positions = _join_geometries(geometries, buildings_df)
+    ids = buildings_df.index.to_numpy()[positions]
+    bounds = np.searchsorted(queries, np.arange(1, len(geometries)))
+    return [part.tolist() for part in np.split(ids, bounds)]
+
+
+def _count_per_query(df: pd.DataFrame, column: str) -> dict[int, dict[str, int]]:
+    counts = df.groupby(["query", column]).size()
+    return {
+        query: group.droplevel(0).to_dict() for query, group in counts.groupby(level=0)
+    }
+
+
+def get_summaries_per_geometry(
+    geometries: list[BaseGeometry],
+    buildings_df: gpd.GeoDataFrame,
+    points_df: gpd.GeoDataFrame,
+) -> list[ZefirMapSummaryResponse]:
+    """
+    Summarizes buildings and points within every query geometry,
+    matched rows of all geometries are reduced with one group-by per statistic.
+
+    Parameters:
+    - geometries (list): query Polygons and MultiPolygons.
+    - buildings_df (gpd.GeoDataFrame): buildings layer with spatial index.
+    - points_df (gpd.GeoDataFrame): points layer with spatial index.
+
+    Returns:
+    list: ZefirMapSummaryResponse of every query geometry, in the order of geometries.
+    """
+    emissions = [emission.value for emission in PointEmission]
+    queries, positions = _join_geometries(geometries, buildings_df)
+    buildings = buildings_df[["buildingType", "heatType"]].iloc[positions]
+    buildings = buildings.assign(query=queries)
+    queries, positions = _join_geometries(geometries, points_df)
+    points = points_df[emissions].iloc[positions].assign(query=queries)
+
+    query_range = pd.RangeIndex(len(geometries))
+    building_counts = (
+        buildings.groupby("query").size().reindex(query_range, fill_value=0)
+    )
+    building_types = _count_per_query(buildings, "buildingType")
+    heat_types = _count_per_query(buildings, "heatType")
+    point_counts = points.groupby("query").size().reindex(query_range, fill_value=0)
+    emission_sums = (
+        points.groupby("query")[emissions].sum().reindex(query_range, fill_value=0.0)
+    )
     return [
-        ZefirMapPointResponse.create_points_from_dict(
-            coordinates=data["coordinates"],
-            building_type=data["buildingType"],
-            heat_type=data["heatType"],
-            name=id,
-            boilerEmission=data["boilerEmission"],
-            CO2=data["CO2"],
-            CO=data["CO"],
-            SOX=data["SOX"],
-            NOX=data["NOX"],
-            Benzoapiren=data["Benzoapiren"],
-            PM10=data["PM10"],
-            PM25=data["PM25"],
+        ZefirMapSummaryResponse(
+            buildingCount=building_counts[query],
+            buildingTypes=building_types.get(query, {}),
+            heatTypes=heat_types.get(query, {}),
+            pointCount=point_counts[query],
+            emissions=emission_sums.loc[query].to_dict(),
         )
-        for id, data in resource_df.to_dict("index").items()
+        for query in query_range
     ]
+
+
+def get_summary_from_geometry(
+    buildings_df: gpd.GeoDataFrame,
+    points_df: gpd.GeoDataFrame,
+    coordinates: PolygonCoordinates | list[PolygonCoordinates],
+    geometry_type: Literal["Polygon", "MultiPolygon"],
+) -> ZefirMapSummaryResponse:
+    """
+    Summarizes buildings and points within a specified polygon.
+
+    Parameters:
+    - buildings_df (gpd.GeoDataFrame): buildings layer with spatial index.
+    - points_df (gpd.GeoDataFrame): points layer with spatial index.
+    - coordinates (list): Polygon or MultiPolygon coordinates.
+    - geometry_type (str): type of the geometry given by coordinates.
+
+    Returns:
+    ZefirMapSummaryResponse: counts of buildings per buildingType and heatType
+    and emissions summed over points.
+    """
+    [summary] = get_summaries_per_geometry(
+        geometries=[create_geometry(coordinates, geometry_type)],
+        buildings_df=buildings_df,
+        points_df=points_df,
+    )
+    return summary
@@ -0,0 +1,109 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import math
+from typing import Final
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from zefir_api.api.crud.map_handler import FEATURE_COLUMN
+from zefir_api.api.crud.map_tiles import TILE_PIXELS
+from zefir_api.api.json_response import encode_json_items
+from zefir_api.api.payload.zefir_map import ZefirMapBuildingResponse
+
+# every tier serves zoom levels up to its max zoom, larger zooms get full precision geometry
+LOD_MAX_ZOOMS: Final[tuple[int, ...]] = (12, 14, 16)
+
+
+def get_lod_column(max_zoom: int) -> str:
+    return f"{FEATURE_COLUMN}_z{max_zoom}"
+
+
+def get_lod_tolerance(max_zoom: int) -> float:
+    """Half of the screen pixel size in degrees at max_zoom."""
+    return 360 / (TILE_PIXELS * 2**max_zoom) / 2
+
+
+def get_lod_decimals(max_zoom: int) -> int:
+    """Number of decimal digits keeping coordinates within 1/16 of a pixel at max_zoom."""
+    return math.ceil(-math.log10(get_lod_tolerance(max_zoom) / 8))
+
+
+def select_lod_column(zoom: int | None = None, tolerance: float | None = None) -> str:
+    """
+    Selects the feature column for given zoom or simplification tolerance in degrees.
+    Zoom takes precedence, full precision features are returned if neither matches a tier.
+    """
+    if zoom is not None:
+        for max_zoom in LOD_MAX_ZOOMS:
+            if zoom <= max_zoom:
+                return get_lod_column(max_zoom)
+        return FEATURE_COLUMN
+    if tolerance is not None:
+        for max_zoom in LOD_MAX_ZOOMS:
+            if get_lod_tolerance(max_zoom) <= tolerance:
+                return get_lod_column(max_zoom)
+    return FEATURE_COLUMN
+
+
+def _round_coordinates(geometry: np.ndarray, decimals: int) -> np.ndarray:
+    return shapely.transform(
+        geometry, lambda coordinates: np.round(coordinates, decimals)
+    )
+
+
+def render_lod_features(gdf: gpd.GeoDataFrame, max_zoom: int) -> list[bytes]:
+    """
+    Encodes buildings as GeoJSON Features with geometry simplified for zoom levels up to
+    max_zoom and coordinates quantized to the tier precision. Buildings which collapse during
+    simplification keep their original outline with quantized coordinates.
+
+    Parameters:
+    - gdf (gpd.GeoDataFrame): buildings layer with buildingType and heatType.
+    - max_zoom (int): max zoom of the tier.
+
+    Returns:
+    list: encoded ZefirMapBuildingResponse features in the layer order.
+    """
+    decimals = get_lod_decimals(max_zoom)
+    geometry = gdf.geometry.to_numpy()
+    simplified = _round_coordinates(
+        shapely.simplify(geometry, get_lod_tolerance(max_zoom), preserve_topology=True),
+        decimals,
+    )
+    collapsed = shapely.is_empty(simplified) | ~shapely.is_valid(simplified)
+    simplified[collapsed] = _round_coordinates(geometry[collapsed], decimals)
+
+    return encode_json_items(
+        ZefirMapBuildingResponse,
+        (
+            ZefirMapBuildingResponse.create_polygons_from_dict(
+                coordinates=json.loads(geojson)["coordinates"],
+                building_type=building_type,
+                heat_type=heat_type,
+                name=id,
+            )
+            for id, geojson, building_type, heat_type in zip(
+                gdf.index,
+                shapely.to_geojson(simplified),
+                gdf["buildingType"],
+                gdf["heatType"],
+            )
+        ),
+    )
@@ -0,0 +1,200 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Final
+
+import geopandas as gpd
+import mapbox_vector_tile
+import numpy as np
+import shapely
+
+_logger = logging.getLogger(__name__)
+
+MVT_MEDIA_TYPE: Final[str] = "application/vnd.mapbox-vector-tile"
+# map layers hold (lon, lat) coordinates in degrees
+MAP_CRS: Final[str] = "EPSG:4326"
+MAX_TILE_ZOOM: Final[int] = 22
+TILE_EXTENT: Final[int] = 4096
+TILE_PIXELS: Final[int] = 256
+TILE_BUFFER: Final[int] = 64
+BUILDINGS_LAYER: Final[str] = "buildings"
+
+_EARTH_RADIUS: Final[float] = 6378137.0
+_WORLD_HALF_SIZE: Final[float] = np.pi * _EARTH_RADIUS
+
+TileKey = tuple[str, int, int, int]
+
+
+def lonlat_to_mercator(coordinates: np.ndarray) -> np.ndarray:
+    """Projects (lon, lat) coordinates in degrees to web mercator (EPSG:3857) meters."""
+    lon, lat = np.radians(coordinates[:, 0]), np.radians(coordinates[:, 1])
+    return np.column_stack(
+        (_EARTH_RADIUS * lon, _EARTH_RADIUS * np.log(np.tan(np.pi / 4 + lat / 2)))
+    )
+
+
+def mercator_to_lonlat(coordinates: np.ndarray) -> np.ndarray:
+    x, y = coordinates[:, 0], coordinates[:, 1]
+    return np.column_stack(
+        (
+            np.degrees(x / _EARTH_RADIUS),
+            np.degrees(2 * np.arctan(np.exp(y / _EARTH_RADIUS)) - np.pi / 2),
+        )
+    )
+
+
+def check_map_crs(gdf: gpd.GeoDataFrame) -> None:
+    """Raises ValueError if the layer is not in MAP_CRS, which the web mercator math relies on."""
+    if gdf.crs != MAP_CRS:
+        raise ValueError(f"Map layer CRS {gdf.crs} is not {MAP_CRS}")
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def get_tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Returns (min_x, min_y, max_x, max_y) of the XYZ tile in web mercator meters."""
+    tile_size = 2 * _WORLD_HALF_SIZE / 2**z
+    min_x = -_WORLD_HALF_SIZE + x * tile_size
+    max_y = _WORLD_HALF_SIZE - y * tile_size
+    return min_x, max_y - tile_size, min_x + tile_size, max_y
+
+
+def create_buildings_tile(gdf: gpd.GeoDataFrame, z: int, x: int, y: int) -> bytes:
+    """
+    Encodes buildings intersecting the tile into a Mapbox Vector Tile.
+
+    Parameters:
+    - gdf (gpd.GeoDataFrame): building layer in MAP_CRS with buildingType and heatType.
+    - z, x, y (int): XYZ tile coordinates.
+
+    Returns:
+    bytes: tile with "buildings" layer, geometries are clipped to the buffered tile
+    and simplified to the tile resolution.
+    """
+    check_map_crs(gdf)
+    bounds = get_tile_bounds(z, x, y)
+    pixel_size = (bounds[2] - bounds[0]) / TILE_EXTENT
+    buffer = TILE_BUFFER * pixel_size
+    clip_bounds = (
+        bounds[0] - buffer,
+        bounds[1] - buffer,
+        bounds[2] + buffer,
+        bounds[3] + buffer,
+    )
+    lonlat_bounds = mercator_to_lonlat(np.reshape(clip_bounds, (2, 2))).ravel()
+    positions = np.sort(
+        gdf.sindex.query(shapely.box(*lonlat_bounds), predicate="intersects")
+    )
+    if not len(positions):
+        return b""
+    selected = gdf.iloc[positions]
+    geometry = shapely.transform(selected.geometry.to_numpy(), lonlat_to_mercator)
+    geometry = shapely.clip_by_rect(geometry, *clip_bounds)
+    geometry = shapely.simplify(geometry, pixel_size, preserve_topology=True)
+    visible = ~shapely.is_empty(geometry)
+
+    features = [
+        {
+            "id": int(feature_id),
+            "geometry": feature_geometry,
+            "properties": {"buildingType": building_type, "heatType": heat_type},
+        }
+        for feature_id, feature_geometry, building_type, heat_type in zip(
+            selected.index[visible],
+            geometry[visible],
+            selected["buildingType"].values[visible],
+            selected["heatType"].values[visible],
+        )
+    ]
+    if not features:
+        return b""
+    return mapbox_vector_tile.encode(
+        [{"name": BUILDINGS_LAYER, "features": features}],
+        default_options={"quantize_bounds": bounds, "extents": TILE_EXTENT},
+    )
+
+
+class TileCache:
+    """
+    Cache of encoded tiles, bounded in memory by the number of tiles and optionally backed by
+    files in cache_path. Entries are stored under the layer fingerprint,
+    so tiles of changed map data are never served.
+
+    Parameters:
+    - max_items (int): maximum number of tiles kept in memory.
+    - cache_path (Path | None): directory of the on-disk cache, disabled if None.
+    """
+
+    def __init__(self, max_items: int, cache_path: Path | None = None) -> None:
+        self._max_items = max_items
+        self._cache_path = cache_path
+        self._tiles: OrderedDict[tuple[TileKey, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def _get_file_path(self, fingerprint: str, key: TileKey) -> Path | None:
+        if self._cache_path is None:
+            return None
+        area, z, x, y = key
+        return self._cache_path / area / fingerprint[:16] / str(z) / str(x) / f"{y}.mvt"
+
+    def _remember(self, key: tuple[TileKey, str], tile: bytes) -> None:
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self._max_items:
+                self._tiles.popitem(last=False)
+
+    def get_or_create(
+        self, key: TileKey, fingerprint: str, create: Callable[[], bytes]
+    ) -> bytes:
+        memory_key = (key, fingerprint)
+        with self._lock:
+            if (tile := self._tiles.get(memory_key)) is not None:
+                self._tiles.move_to_end(memory_key)
+                return tile
+        file_path = self._get_file_path(fingerprint, key)
+        if file_path is not None and file_path.is_file():
+            tile = file_path.read_bytes()
+        else:
+            tile = create()
+            if file_path is not None:
+                self._write(file_path, tile)
+        self._remember(memory_key, tile)
+        return tile
+
+    @staticmethod
+    def _write(file_path: Path, tile: bytes) -> None:
+        tmp_path = file_path.with_name(f"{file_path.name}.{threading.get_ident()}.tmp")
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(tile)
+            tmp_path.replace(file_path)
+        except OSError as exc:
+            _logger.warning(f"Tile {file_path} not written: {exc}")
+            tmp_path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tiles.clear()
@@ -17,6 +17,7 @@
 import pandas as pd
 from zefir_analytics import ZefirEngine
 
+from zefir_api.api.cache import cache_per_object
 from zefir_api.api.config import params_config
 from zefir_api.api.crud.utils import (
     flatten_multiindex,
@@ -28,14 +29,36 @@ from zefir_api.api.payload.zefir_data import ZefirDataResponse
 from zefir_api.api.translation import translator
 
 
-def _map_name_to_type(ze: ZefirEngine, items: list[str]) -> list[str]:
-    mapped_items: list[str] = []
-    for item in items:
-        if item in ze.network.generators:
-            mapped_items.append(ze.network.generators[item].energy_source_type)
-        if item in ze.network.storages:
-            mapped_items.append(ze.network.storages[item].energy_source_type)
-    return mapped_items
+@cache_per_object
+def _get_installed_elements_per_lbs(ze: ZefirEngine) -> pd.DataFrame:
+    """
+    Number of generators and storages with non-zero capacity, as year x (lbs, element type) frame.
+    Capacities of all local balancing stacks are fetched in one call and cached per engine.
+    """
+    capacities = ze.lbs_params.get_lbs_capacity(list(ze.lbs_params.lbs_names))
+    if not capacities:
+        return pd.DataFrame(
+            columns=pd.MultiIndex.from_tuples([], names=["lbs", "type"]), dtype=int
+        )
+    element_types = {
+        name: element.energy_source_type
+        for elements in (ze.network.generators, ze.network.storages)
+        for name, element in elements.items()
+    }
+    installed = pd.concat(
+        {lbs_name: power != 0 for lbs_name, power in capacities.items()}, axis=1
+    ).T
+    return (
+        installed.groupby(
+            [
+                installed.index.get_level_values(0),
+                installed.index.get_level_values(1).map(element_types),
+            ]
+        )
+        .sum()
+        .rename_axis(["lbs", "type"])
+        .T
+    )
 
 
 def _filter_types_to_not_display_at_installed_power(df: pd.DataFrame) -> pd.DataFrame:
@@ -74,15 +97,14 @@ def get_increasing_amount_of_devices(ze: ZefirEngine) -> ZefirDataResponse:
     }
     n_consumers = ze.aggregated_consumer_params.get_n_consumers()
     device_factor = get_row_amount_of_device_in_agg(fractions, n_consumers)
-    dfs_power_type_corrections = []
-    for df in device_factor.values():
-        for lbs_name in df.columns:
-            power = ze.lbs_params.get_lbs_capacity(lbs_name)
-            power.columns = _map_name_to_type(ze, power.columns)
-            a = power.mask(power != 0, df[lbs_name], axis=0)
-            dfs_power_type_corrections.append(a)
-    device_df = pd.concat(dfs_power_type_corrections, axis=1)
-    device_df = device_df.groupby(level=0, axis=1).sum().T
+    factor_df = pd.concat(device_factor.values(), axis=1)
+    factor_df = factor_df.T.groupby(level=0).sum().T
+    installed = _get_installed_elements_per_lbs(ze)
+    installed = installed.loc[
+        :, installed.columns.get_level_values("lbs").isin(factor_df.columns)
+    ]
+    device_df = installed.mul(factor_df, axis=1, level="lbs")
+    device_df = device_df.T.groupby(level="type").sum()
     device_df = translate_df_by_map(
         df=device_df, mapping_dict=translator.translated_names
     )
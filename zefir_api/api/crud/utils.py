@@ -14,30 +14,141 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from typing import Final
+
+import numpy as np
 import pandas as pd
 from pyzefir.model.network import Network
 from zefir_analytics import ZefirEngine
 from pyzefir.model.network_elements.energy_sources.generator import Generator
 
+from zefir_api.api.cache import cache_per_object
+from zefir_api.api.engine_builder import CachedZefirEngine
+from zefir_api.api.results import summarize_hourly_results
+
 
 class NotFoundInNetworkError(Exception):
     pass
 
 
-def _find_bus_by_energy_type(
-    network: Network, gen_name: str, energy_type: str
-) -> str | None:
-    for bus_name in network.generators[gen_name].buses:
-        if network.buses[bus_name].energy_type == energy_type:
-            return bus_name
-    return None
+NOT_FOUND_ENERGY_TYPE: Final[str] = "not_found_energy_type"
+
+
+class NetworkIndex:
+    """
+    Topology index of the network resolving generator -> bus -> lbs -> aggregate per energy type.
+
+    Parameters:
+    - network (Network): network the index is built from.
+    """
+
+    def __init__(self, network: Network) -> None:
+        self._generator_names = frozenset(network.generators)
+        self._generator_bus: dict[tuple[str, str], str] = {}
+        for gen_name, generator in network.generators.items():
+            for bus_name in generator.buses:
+                energy_type = network.buses[bus_name].energy_type
+                self._generator_bus.setdefault((gen_name, energy_type), bus_name)
+
+        self._bus_lbs: dict[tuple[str, str], str] = {}
+        for lbs in network.local_balancing_stacks.values():
+            for energy_type, bus_names in lbs.buses.items():
+                for bus_name in bus_names:
+                    self._bus_lbs.setdefault((bus_name, energy_type), lbs.name)
+
+        self.lbs_aggregate: dict[str, str] = {}
+        for aggr in network.aggregated_consumers.values():
+            for lbs_name in aggr.available_stacks:
+                self.lbs_aggregate.setdefault(lbs_name, aggr.name)
+
+        self.aggregate_generators: dict[str, dict[str, list[str]]] = {}
+        for (gen_name, energy_type), bus_name in self._generator_bus.items():
+            lbs_name = self._bus_lbs.get((bus_name, energy_type))
+            if (aggr_name := self.lbs_aggregate.get(lbs_name or "")) is not None:
+                self.aggregate_generators.setdefault(aggr_name, {}).setdefault(
+                    energy_type, []
+                ).append(gen_name)
+
+    def get_aggregate(self, gen_name: str, energy_type: str) -> str:
+        """
+        Returns name of the aggregate the generator supplies with given energy type
+        or NOT_FOUND_ENERGY_TYPE if the generator is not connected to a bus of that type.
+        """
+        if (bus_name := self._generator_bus.get((gen_name, energy_type))) is None:
+            if gen_name not in self._generator_names:
+                raise KeyError(gen_name)
+            return NOT_FOUND_ENERGY_TYPE
+        if (lbs_name := self._bus_lbs.get((bus_name, energy_type))) is None:
+            raise NotFoundInNetworkError("Lbs not found")
+        if (aggr_name := self.lbs_aggregate.get(lbs_name)) is None:
+            raise NotFoundInNetworkError("Aggr not Found")
+        return aggr_name
+
+    def get_generators(self, aggr_name: str, energy_type: str) -> list[str]:
+        return self.aggregate_generators.get(aggr_name, {}).get(energy_type, [])
+
+
+get_network_index: Final = cache_per_object(NetworkIndex)
+
+
+class AggregateMatrices:
+    """
+    Columnar view of the network aggregated consumers, rows follow network order.
+
+    Parameters:
+    - network (Network): network the matrices are built from.
+
+    Attributes:
+    - n_consumers (pd.DataFrame): aggregate x year number of consumers.
+    - average_area (pd.Series): average usable area per aggregate.
+    - yearly_energy_usage (dict): energy type -> aggregate x year usage per consumer,
+      only aggregates using given energy type have a row.
+    - energy_types (dict): aggregate -> energy types it uses, in the order of its yearly_energy_usage.
+    """
+
+    def __init__(self, network: Network) -> None:
+        aggregates = list(network.aggregated_consumers.values())
+        names = pd.Index([aggr.name for aggr in aggregates])
+        self.n_consumers: pd.DataFrame = _stack_rows(
+            [aggr.n_consumers for aggr in aggregates], names
+        )
+        self.average_area = pd.Series(
+            [aggr.average_area for aggr in aggregates], index=names, dtype=float
+        )
+        self.energy_types: dict[str, tuple[str, ...]] = {
+            aggr.name: tuple(aggr.yearly_energy_usage) for aggr in aggregates
+        }
+        usage: dict[str, dict[str, pd.Series]] = {}
+        for aggr in aggregates:
+            for energy_type, energy_usage in aggr.yearly_energy_usage.items():
+                usage.setdefault(energy_type, {})[aggr.name] = energy_usage
+        self.yearly_energy_usage: dict[str, pd.DataFrame] = {
+            energy_type: _stack_rows(list(rows.values()), pd.Index(list(rows)))
+            for energy_type, rows in usage.items()
+        }
+
+    def get_yearly_usage(
+        self, energy_type: str, aggr_names: list[str] | pd.Index | None = None
+    ) -> pd.DataFrame:
+        """
+        Returns aggregate x year usage of energy_type multiplied by number of consumers
+        for aggr_names (all aggregates by default) which use given energy type.
+        """
+        usage = self.yearly_energy_usage.get(energy_type)
+        if usage is None:
+            return pd.DataFrame(columns=self.n_consumers.columns, dtype=float)
+        if aggr_names is not None:
+            usage = usage.loc[usage.index.intersection(aggr_names, sort=False)]
+        return usage * self.n_consumers.loc[usage.index]
 
 
-def _find_lbs_by_bus(network: Network, bus_name: str, energy_type: str) -> str | None:
-    for lbs in network.local_balancing_stacks.values():
-        if bus_name in lbs.buses[energy_type]:
-            return lbs.name
-    return None
+def _stack_rows(rows: list[pd.Series], index: pd.Index) -> pd.DataFrame:
+    if not rows:
+        return pd.DataFrame(index=index, dtype=float)
+    return pd.concat(rows, axis=1, keys=index).T
+
+
+get_aggregate_matrices: Final = cache_per_object(AggregateMatrices)
 
 
 def get_mapped_generator_to_aggr(
@@ -51,38 +162,78 @@ def get_mapped_generator_to_aggr(
             for name in df.index
         }
     )
-    df = df.drop(index="not_found_energy_type", errors="ignore")
+    df = df.drop(index=NOT_FOUND_ENERGY_TYPE, errors="ignore")
     return df.groupby(df.index).sum()
 
 
 def get_aggr_by_generator_name(gen_name: str, ze: ZefirEngine, energy_type: str) -> str:
-    network = ze.network
-    if not (
-        bus_name := _find_bus_by_energy_type(
-            network=network, gen_name=gen_name, energy_type=energy_type
-        )
-    ):
-        return "not_found_energy_type"
+    return get_network_index(ze.network).get_aggregate(
+        gen_name=gen_name, energy_type=energy_type
+    )
+
+
+@cache_per_object
+def _summarize_engine_results(ze: ZefirEngine) -> dict[str, dict[str, pd.DataFrame]]:
+    return summarize_hourly_results(ze.result_dict)
+
+
+def get_yearly_results(ze: ZefirEngine) -> dict[str, dict[str, pd.DataFrame]]:
+    """Element x year totals of hourly result families, precomputed when the engine is loaded."""
+    if isinstance(ze, CachedZefirEngine):
+        return ze.yearly_results
+    return _summarize_engine_results(ze)
 
-    if not (
-        lbs_name := _find_lbs_by_bus(
-            network=network, bus_name=bus_name, energy_type=energy_type
-        )
-    ):
-        raise NotFoundInNetworkError("Lbs not found")
 
-    for aggr in network.aggregated_consumers.values():
-        if lbs_name in aggr.available_stacks:
-            return aggr.name
-    raise NotFoundInNetworkError("Aggr not Found")
+def _get_sorted_level_codes(
+    index: pd.MultiIndex, level: int
+) -> tuple[np.ndarray, pd.Index]:
+    """Returns level codes renumbered so that they follow sorted level values."""
+    level_values = index.levels[level]
+    order = level_values.argsort()
+    ranks = np.empty(len(order), dtype=np.intp)
+    ranks[order] = np.arange(len(order))
+    codes = np.asarray(index.codes[level])
+    return np.where(codes >= 0, ranks[codes], -1), level_values.take(order)
+
+
+def _compact_codes(codes: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns used codes in ascending order and codes renumbered to positions among them."""
+    used = np.zeros(size, dtype=bool)
+    used[codes] = True
+    return np.flatnonzero(used), (np.cumsum(used) - 1)[codes]
 
 
 def flatten_multiindex(df: pd.DataFrame) -> pd.DataFrame:
-    return df.pivot_table(
-        index=df.index.names[0],
-        columns=df.index.names[1],
-        values=df.columns[0],
-        aggfunc="first",
+    """
+    Reshapes first column of a (name, year) indexed frame into a name x year frame.
+    Equivalent of pivot_table with aggfunc="first": first non-null value wins,
+    both axes are sorted and pairs without a value are NaN.
+    """
+    values = df.iloc[:, 0].to_numpy()
+    row_codes, rows = _get_sorted_level_codes(df.index, 0)
+    col_codes, columns = _get_sorted_level_codes(df.index, 1)
+    mask = pd.notna(values) & (row_codes >= 0) & (col_codes >= 0)
+    row_codes, col_codes, values = row_codes[mask], col_codes[mask], values[mask]
+
+    used_rows, row_codes = _compact_codes(row_codes, len(rows))
+    used_columns, col_codes = _compact_codes(col_codes, len(columns))
+    cells = row_codes * len(used_columns) + col_codes
+    first = ~pd.Series(cells).duplicated().to_numpy()
+
+    shape = (len(used_rows), len(used_columns))
+    if first.sum() == shape[0] * shape[1]:
+        result = np.empty(shape, dtype=values.dtype)
+    elif values.dtype.kind == "f":
+        result = np.full(shape, np.nan, dtype=values.dtype)
+    elif values.dtype.kind in "iu":
+        result = np.full(shape, np.nan, dtype=np.float64)
+    else:
+        result = np.full(shape, np.nan, dtype=object)
+    result[row_codes[first], col_codes[first]] = values[first]
+    return pd.DataFrame(
+        result,
+        index=rows.take(used_rows).rename(df.index.names[0]),
+        columns=columns.take(used_columns).rename(df.index.names[1]),
     )
 
 
@@ -14,10 +14,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Callable, Final
+import logging
+from typing import Callable, Final, Iterable
 
 from zefir_analytics import ZefirEngine
 
+from zefir_api.api.cache import ResponseCache
+from zefir_api.api.config import params_config
 from zefir_api.api.crud.costs import (
     get_capex,
     get_ets,
@@ -45,8 +48,12 @@ from zefir_api.api.crud.power_and_devices import (
     get_increasing_amount_of_devices,
     get_installed_power,
 )
+from zefir_api.api.json_response import encode_json
 from zefir_api.api.parameters import DataCategory
 from zefir_api.api.payload.zefir_data import ZefirDataResponse
+from zefir_api.api.zefir_engine import ze
+
+_logger = logging.getLogger(__name__)
 
 method_to_data_category_map: Final[
     dict[DataCategory, Callable[[ZefirEngine], ZefirDataResponse]]
@@ -69,3 +76,32 @@ method_to_data_category_map: Final[
     DataCategory.TOTAL_COSTS: get_total_costs,
     DataCategory.TRANSPORT_EMISSIONS: get_transport_emissions,
 }
+
+zefir_data_cache: Final[ResponseCache[bytes]] = ResponseCache()
+ze.register_reload_hook(zefir_data_cache.invalidate)
+
+
+def get_zefir_data_json(scenario_id: int, data_category: DataCategory) -> bytes:
+    return zefir_data_cache.get_or_compute(
+        scenario_id,
+        data_category,
+        lambda: encode_json(
+            ZefirDataResponse,
+            method_to_data_category_map[data_category](ze[scenario_id]),
+        ),
+    )
+
+
+def warm_up_zefir_data_cache(scenario_ids: Iterable[int]) -> None:
+    for scenario_id in scenario_ids:
+        for data_category in DataCategory:
+            try:
+                get_zefir_data_json(scenario_id, data_category)
+            except Exception as e:
+                _logger.warning(
+                    f"{data_category} for scenario {scenario_id} not precomputed: {e}"
+                )
+
+
+if params_config.warm_response_cache:
+    warm_up_zefir_data_cache(ze.resident)
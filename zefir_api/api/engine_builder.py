@@ -0,0 +1,184 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import logging
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cached_property, partial
+from pathlib import Path
+from typing import Any, Final, cast
+
+import pandas as pd
+from pyzefir.model.network import Network
+from zefir_analytics import ZefirEngine
+from zefir_analytics import _engine as _d
+
+from zefir_api.api.cache import MemoizedQuery
+from zefir_api.api.config import params_config
+from zefir_api.api.results import drop_hourly_results, summarize_hourly_results
+from zefir_api.api.snapshot import SnapshotStore, fingerprint_paths
+
+_logger = logging.getLogger(__name__)
+
+
+def _get_snapshot_path() -> Path | None:
+    if params_config.snapshot_path is not None:
+        return params_config.snapshot_path
+    if params_config.share_engine_memory:
+        shm_path = Path("/dev/shm")
+        base_path = shm_path if shm_path.is_dir() else Path(tempfile.gettempdir())
+        return base_path / "zefir_api_snapshots"
+    return None
+
+
+snapshot_store: Final = (
+    SnapshotStore(snapshot_path)
+    if (snapshot_path := _get_snapshot_path()) is not None
+    else None
+)
+
+
+class CachedZefirEngine(ZefirEngine):
+    """
+    ZefirEngine which reads its source and result data from a binary snapshot when snapshot_path
+    is configured. The CSV files are parsed only if the snapshot is missing or its fingerprint does
+    not match the current content of the source and result directories.
+
+    Queries of source_params, aggregated_consumer_params and lbs_params are memoized,
+    so handlers asking for the same aggregation share one read-only result.
+
+    Hourly result families are summed to yearly totals once at load time (yearly_results),
+    hourly frames of families listed in drop_hourly_results are freed afterwards.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.yearly_results = summarize_hourly_results(self.result_dict)
+        drop_hourly_results(self.result_dict, params_config.drop_hourly_results)
+
+    @cached_property
+    def source_params(self) -> _d.SourceParametersOverYearsQuery:
+        return cast(
+            _d.SourceParametersOverYearsQuery,
+            MemoizedQuery(self._source_parameters_over_years),
+        )
+
+    @cached_property
+    def aggregated_consumer_params(
+        self,
+    ) -> _d.AggregatedConsumerParametersOverYearsQuery:
+        return cast(
+            _d.AggregatedConsumerParametersOverYearsQuery,
+            MemoizedQuery(self._aggregated_consumer_parameters_over_years),
+        )
+
+    @cached_property
+    def lbs_params(self) -> _d.LbsParametersOverYearsQuery:
+        return cast(
+            _d.LbsParametersOverYearsQuery,
+            MemoizedQuery(self._variability_of_lbs),
+        )
+
+    @staticmethod
+    def _load_input_data(
+        source_path: Path,
+        result_path: Path,
+        scenario_name: str,
+    ) -> tuple[
+        dict[str, dict[str, pd.DataFrame]],
+        Network,
+        dict[str, dict[str, dict[str, pd.DataFrame]]],
+    ]:
+        load_from_csv = partial(
+            ZefirEngine._load_input_data, source_path, result_path, scenario_name
+        )
+        if snapshot_store is None:
+            return load_from_csv()
+        paths_hash = hashlib.sha1(
+            f"{Path(source_path).resolve()}:{Path(result_path).resolve()}".encode()
+        ).hexdigest()[:12]
+        return snapshot_store.load_or_create(
+            name=f"{scenario_name}-{paths_hash}",
+            fingerprint=fingerprint_paths(source_path, result_path),
+            factory=load_from_csv,
+        )
+
+
+def _create_engine(config_path: Path) -> tuple[ZefirEngine, float]:
+    start = time.perf_counter()
+    engine = CachedZefirEngine.create_from_config(config_path)
+    return engine, time.perf_counter() - start
+
+
+def _create_worker_engine(config_path: Path) -> tuple[ZefirEngine | None, float]:
+    engine, load_time = _create_engine(config_path)
+    if snapshot_store is not None:
+        # the engine data is already in the snapshot written by this worker
+        return None, load_time
+    return engine, load_time
+
+
+def build_engine(config_path: Path) -> ZefirEngine:
+    engine, load_time = _create_engine(config_path)
+    _logger.info(f"Scenario {engine.scenario_name} loaded in {load_time:.2f}s")
+    return engine
+
+
+def build_engines(
+    config_paths: dict[int, Path], workers: int = 1
+) -> dict[int, ZefirEngine]:
+    """
+    Builds engines for all given scenarios, in a process pool if more than one worker is requested.
+
+    Parameters:
+    - config_paths (dict[int, Path]): scenario id mapped to the scenario config file.
+    - workers (int): number of worker processes, 1 builds engines serially in the current process.
+
+    Returns:
+    dict[int, ZefirEngine]: engines in the order of given config_paths.
+
+    Engines built in workers are returned through the executor, which pickles them once.
+    If snapshots are enabled, workers only write the snapshots and the engines are mapped
+    from them in the current process.
+    """
+    if workers <= 1 or len(config_paths) <= 1:
+        return {
+            scenario_id: build_engine(config_path)
+            for scenario_id, config_path in config_paths.items()
+        }
+    start = time.perf_counter()
+    engines: dict[int, ZefirEngine] = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(config_paths))) as pool:
+        futures = {
+            pool.submit(_create_worker_engine, config_path): scenario_id
+            for scenario_id, config_path in config_paths.items()
+        }
+        for future in as_completed(futures):
+            scenario_id = futures[future]
+            engine, load_time = future.result()
+            engines[scenario_id] = (
+                engine
+                if engine is not None
+                else CachedZefirEngine.create_from_config(config_paths[scenario_id])
+            )
+            _logger.info(f"Scenario {scenario_id} loaded in {load_time:.2f}s")
+    _logger.info(
+        f"{len(engines)} scenarios loaded by {workers} workers "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return {scenario_id: engines[scenario_id] for scenario_id in config_paths}
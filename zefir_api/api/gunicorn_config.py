@@ -14,7 +14,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import gc
 import os
+from typing import Any
 
 from uvicorn.workers import UvicornWorker
 
@@ -23,6 +25,12 @@ class Worker(UvicornWorker):
     pass
 
 
+def pre_fork(server: Any, worker: Any) -> None:
+    # move preloaded objects out of reach of the garbage collector, otherwise
+    # the first collection in a worker touches and copies all their pages
+    gc.freeze()
+
+
 bind = "0.0.0.0:" + os.getenv("API_PORT", "5050")
 worker_class = "zefir_api.api.gunicorn_config.Worker"
 timeout = 120
@@ -38,5 +46,5 @@ access_log_format = (
     '"referer": "%(f)s",'
     "}"
 )
-workers = 3
+workers = int(os.getenv("API_WORKERS", "3"))
 preload_app = True
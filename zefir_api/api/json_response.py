@@ -0,0 +1,94 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+from itertools import islice
+from typing import Any, Callable, Final, Iterable, Iterator
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from starlette import status
+
+
+def _dumps(value: Any) -> bytes:
+    # same settings as starlette JSONResponse, NaN and infinity raise ValueError
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def encode_json(response_type: Any, value: Any) -> bytes:
+    """Encodes value the same way FastAPI renders a response declared with given response_model."""
+    return _dumps(
+        TypeAdapter(response_type).dump_python(value, mode="json", by_alias=True)
+    )
+
+
+STREAM_CHUNK_SIZE: Final[int] = 1000
+
+
+def encode_json_items(item_type: Any, items: Iterable[Any]) -> list[bytes]:
+    """Encodes every item separately, the same way as it is rendered inside encode_json."""
+    adapter = TypeAdapter(item_type)
+    return [
+        _dumps(adapter.dump_python(item, mode="json", by_alias=True)) for item in items
+    ]
+
+
+def stream_json_fragments(
+    fragments: Iterable[bytes], chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Joins already encoded JSON values into a JSON array sent in chunks of chunk_size values."""
+    iterator = iter(fragments)
+    prefix = b"["
+    while chunk := list(islice(iterator, chunk_size)):
+        yield prefix + b",".join(chunk)
+        prefix = b","
+    yield b"[]" if prefix == b"[" else b"]"
+
+
+def create_etag(fingerprint: str, request: Request) -> str:
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha256(f"{fingerprint}:{request.url.path}:{query}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    if (if_none_match := request.headers.get("if-none-match")) is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def create_json_response(
+    request: Request, etag: str, content: Callable[[], bytes]
+) -> Response:
+    """
+    Returns 304 Not Modified if the client already holds the response with given ETag,
+    otherwise the encoded response returned by content.
+    """
+    if _is_not_modified(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return Response(
+        content=content(), media_type="application/json", headers={"ETag": etag}
+    )
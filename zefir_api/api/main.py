@@ -15,11 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
-from typing import Final
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Final
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from zefir_api.api.map import start_maps_preload
 from zefir_api.api.router.areas import areas_router
 from zefir_api.api.router.root import root_router
 from zefir_api.api.router.zefir_aggregate import zefir_agg_router
@@ -41,7 +43,15 @@ else:
         version=get_api_version(),
     )
 
-app: Final = FastAPI(**settings)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # runs in every server worker, after gunicorn forked it from the preloaded master
+    start_maps_preload()
+    yield
+
+
+app: Final = FastAPI(lifespan=lifespan, **settings)
 
 request_origins = [
     "http://localhost",
@@ -15,54 +15,240 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import logging
+import os
+import threading
 from pathlib import Path
-from typing import Final
+from typing import Callable, Final
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-from shapely import Polygon
+import shapely
+from shapely import Point, Polygon
 
 from zefir_api.api.config import params_config
+from zefir_api.api.crud.map_handler import (
+    FEATURE_COLUMN,
+    render_building_features,
+    render_point_features,
+)
+from zefir_api.api.crud.map_lod import (
+    LOD_MAX_ZOOMS,
+    get_lod_column,
+    render_lod_features,
+)
+from zefir_api.api.crud.map_tiles import MAP_CRS
+from zefir_api.api.registry import ResourceRegistry
+from zefir_api.api.snapshot import fingerprint_paths
+
+_logger = logging.getLogger(__name__)
 
 
 def load_geo_file(file_path: Path) -> pd.DataFrame:
-    df = pd.read_csv(file_path, index_col="id")
-    df["coordinates"] = df["coordinates"].apply(lambda x: json.loads(x))
-    return df
+    """Reads map layer csv, coordinates are kept as json text."""
+    return pd.read_csv(file_path, index_col="id")
+
+
+def _create_geometry(coordinates: pd.Series, geometry_type: str) -> np.ndarray:
+    return shapely.from_geojson(
+        f'{{"type":"{geometry_type}","coordinates":' + coordinates + "}",
+        on_invalid="ignore",
+    )
 
 
 def load_polygon_map_file(filepath: Path) -> gpd.GeoDataFrame:
     df = load_geo_file(filepath)
-    df["geometry"] = df["coordinates"].apply(
-        lambda x: Polygon([(point[0], point[1]) for point in x[0]])
+    polygons = _create_geometry(df["coordinates"], "Polygon")
+    geometry = shapely.polygons(shapely.force_2d(shapely.get_exterior_ring(polygons)))
+    # rings rejected by the GeoJSON reader (not closed, 3D) are built one by one
+    invalid = pd.isna(polygons)
+    geometry[invalid] = [
+        Polygon([(point[0], point[1]) for point in json.loads(x)[0]])
+        for x in df.loc[invalid, "coordinates"]
+    ]
+    df["geometry"] = geometry
+    df[FEATURE_COLUMN] = render_building_features(df)
+    df = df.drop(columns="coordinates")
+    gdf = gpd.GeoDataFrame(df, geometry="geometry", crs=MAP_CRS)
+    # simplified geometry tiers served for low zoom levels
+    for max_zoom in LOD_MAX_ZOOMS:
+        gdf[get_lod_column(max_zoom)] = render_lod_features(gdf, max_zoom)
+    return gdf
+
+
+def load_points_map_file(filepath: Path) -> gpd.GeoDataFrame:
+    df = load_geo_file(filepath)
+    geometry = shapely.force_2d(_create_geometry(df["coordinates"], "Point"))
+    invalid = pd.isna(geometry)
+    geometry[invalid] = [
+        Point(json.loads(x)[:2]) for x in df.loc[invalid, "coordinates"]
+    ]
+    df["geometry"] = geometry
+    df[FEATURE_COLUMN] = render_point_features(df)
+    df = df.drop(columns="coordinates")
+    return gpd.GeoDataFrame(df, geometry="geometry", crs=MAP_CRS)
+
+
+def _is_cache_fresh(cache_path: Path, source_path: Path) -> bool:
+    if not cache_path.is_file():
+        return False
+    return (
+        not source_path.is_file()
+        or cache_path.stat().st_mtime_ns >= source_path.stat().st_mtime_ns
     )
-    gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:2180")
+
+
+def convert_map_file(
+    source_path: Path,
+    cache_path: Path,
+    loader: Callable[[Path], gpd.GeoDataFrame],
+) -> gpd.GeoDataFrame:
+    """
+    Parses map layer csv and stores it as GeoParquet with WKB encoded geometry.
+
+    Parameters:
+    - source_path (Path): path to the csv map layer.
+    - cache_path (Path): path of the GeoParquet file to write.
+    - loader (Callable): parses the csv into GeoDataFrame.
+
+    Returns:
+    gpd.GeoDataFrame: parsed map layer.
+    """
+    gdf = loader(source_path)
+    # per process name, so workers converting the same layer do not write into one file
+    tmp_path = cache_path.with_suffix(f".parquet.{os.getpid()}")
+    try:
+        gdf.to_parquet(tmp_path)
+        tmp_path.replace(cache_path)
+    except Exception as exc:
+        _logger.warning(f"Map cache {cache_path} not written: {exc}")
+        tmp_path.unlink(missing_ok=True)
     return gdf
 
 
-def load_areas_polygon_maps() -> dict[str, gpd.GeoDataFrame]:
-    area_polygon_dict = {}
-    for area_dir in params_config.areas_path.iterdir():
-        if not area_dir.iterdir():
-            continue
-        area_name = area_dir.name
-        area_polygon_dict[area_name] = load_polygon_map_file(
-            params_config.get_polygons_file_path(area_name)
-        )
-    return area_polygon_dict
+def load_map_layer(
+    source_path: Path,
+    cache_path: Path,
+    loader: Callable[[Path], gpd.GeoDataFrame],
+    required_columns: tuple[str, ...] = (FEATURE_COLUMN,),
+) -> gpd.GeoDataFrame:
+    """
+    Loads map layer from GeoParquet cache in one vectorized read,
+    the csv is parsed (and the cache rewritten) only when the cache is missing, stale,
+    lacks any of required_columns or is not in MAP_CRS.
+    """
+    if not params_config.map_cache:
+        return loader(source_path)
+    if _is_cache_fresh(cache_path, source_path):
+        try:
+            gdf = gpd.read_parquet(cache_path)
+            if set(required_columns).issubset(gdf.columns) and gdf.crs == MAP_CRS:
+                return gdf
+        except Exception as exc:
+            _logger.warning(f"Map cache {cache_path} not loaded: {exc}")
+    return convert_map_file(source_path, cache_path, loader)
+
+
+_polygons_fingerprints: Final[dict[str, str]] = {}
+
 
+def get_polygons_fingerprint(area_name: str) -> str:
+    """Fingerprint of the area's building layer as it was loaded, used to key generated tiles."""
+    return _polygons_fingerprints[area_name]
 
-def load_areas_points_maps() -> dict[str, pd.DataFrame]:
-    area_points_dict = {}
-    for area_dir in params_config.areas_path.iterdir():
-        if not area_dir.iterdir():
-            continue
-        area_name = area_dir.name
-        area_points_dict[area_name] = load_geo_file(
-            params_config.get_points_file_path(area_name)
+
+def estimate_layer_nbytes(gdf: gpd.GeoDataFrame) -> int:
+    return int(gdf.memory_usage(deep=True).sum())
+
+
+def load_area_polygon_map(area_name: str) -> gpd.GeoDataFrame:
+    _logger.info(f"Loading polygons map of area {area_name}")
+    fingerprint = fingerprint_paths(params_config.get_polygons_file_path(area_name))
+    gdf = load_map_layer(
+        params_config.get_polygons_file_path(area_name),
+        params_config.get_polygons_cache_path(area_name),
+        load_polygon_map_file,
+        required_columns=(
+            FEATURE_COLUMN,
+            *(get_lod_column(max_zoom) for max_zoom in LOD_MAX_ZOOMS),
+        ),
+    )
+    # build STRtree spatial index up front, so the first map query does not pay for it
+    gdf.sindex
+    _polygons_fingerprints[area_name] = fingerprint
+    return gdf
+
+
+def load_area_points_map(area_name: str) -> gpd.GeoDataFrame:
+    _logger.info(f"Loading points map of area {area_name}")
+    gdf = load_map_layer(
+        params_config.get_points_file_path(area_name),
+        params_config.get_points_cache_path(area_name),
+        load_points_map_file,
+    )
+    gdf.sindex
+    return gdf
+
+
+def get_map_area_names(
+    get_file_path: Callable[[str], Path], get_cache_path: Callable[[str], Path]
+) -> list[str]:
+    """Returns names of areas which have the map layer csv or its GeoParquet cache."""
+    return [
+        area_dir.name
+        for area_dir in sorted(params_config.areas_path.iterdir())
+        if area_dir.is_dir()
+        and (
+            get_file_path(area_dir.name).is_file()
+            or get_cache_path(area_dir.name).is_file()
         )
-    return area_points_dict
+    ]
+
+
+def create_map_registry(
+    area_names: list[str], loader: Callable[[str], gpd.GeoDataFrame]
+) -> ResourceRegistry[str, gpd.GeoDataFrame]:
+    """
+    Creates registry of area map layers, built with their spatial indexes on first access
+    and evicted according to max_loaded_maps and max_maps_bytes.
+    """
+    registry: ResourceRegistry[str, gpd.GeoDataFrame] = ResourceRegistry(
+        keys=area_names,
+        loader=loader,
+        sizeof=estimate_layer_nbytes,
+        max_items=params_config.max_loaded_maps,
+        max_bytes=params_config.max_maps_bytes,
+    )
+    return registry
+
+
+map_resource: Final = create_map_registry(
+    get_map_area_names(
+        params_config.get_polygons_file_path, params_config.get_polygons_cache_path
+    ),
+    load_area_polygon_map,
+)
+points_resource: Final = create_map_registry(
+    get_map_area_names(
+        params_config.get_points_file_path, params_config.get_points_cache_path
+    ),
+    load_area_points_map,
+)
+
+
+def _preload_maps() -> None:
+    map_resource.preload()
+    points_resource.preload()
 
 
-map_resource: Final = load_areas_polygon_maps()
-points_resource: Final = load_areas_points_maps()
+def start_maps_preload() -> threading.Thread | None:
+    """
+    Builds map layers of all areas in a background thread if preload_maps is set.
+    Called on application startup, so every server worker preloads its own registries.
+    """
+    if not params_config.preload_maps:
+        return None
+    thread = threading.Thread(target=_preload_maps, daemon=True)
+    thread.start()
+    return thread
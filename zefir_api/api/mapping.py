@@ -119,4 +119,4 @@ class NameTranslator:
         )
 
 
-translator: Final = NameTranslator(next(iter(ze.values())).network)
+translator: Final = NameTranslator(ze[next(iter(ze))].network)
@@ -65,6 +65,23 @@ class StaticPlotsFileNames(StrEnum):
     HEATED_AREA = auto()
 
 
+@unique
+class PointEmission(StrEnum):
+    CO2 = "CO2"
+    CO = "CO"
+    SOX = "SOX"
+    NOX = "NOX"
+    Benzoapiren = "Benzoapiren"
+    PM10 = "PM10"
+    PM25 = "PM25"
+
+
+@unique
+class MapJoinResult(StrEnum):
+    IDS = auto()
+    SUMMARY = auto()
+
+
 @dataclass(frozen=True)
 class Scenario:
     id: int
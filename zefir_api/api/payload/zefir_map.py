@@ -16,7 +16,7 @@
 
 from __future__ import annotations
 
-from typing import Literal, TypeAlias
+from typing import Annotated, Literal, TypeAlias
 
 from pydantic import BaseModel, Field
 
@@ -55,6 +55,18 @@ class PointProperties(BuildingProperty):
     PM25: float
 
 
+class ClusterProperties(BaseModel):
+    cluster: bool = True
+    pointCount: int
+    CO2: float
+    CO: float
+    SOX: float
+    NOX: float
+    Benzoapiren: float
+    PM10: float
+    PM25: float
+
+
 class ZefirMapBuildingResponse(BaseModel):
     type: str = "Feature"
     id: int
@@ -110,3 +122,38 @@ class ZefirMapPointResponse(BaseModel):
             PM25=PM25,
         )
         return ZefirMapPointResponse(id=name, geometry=geometry, properties=properties)
+
+
+class ZefirMapClusterResponse(BaseModel):
+    type: str = "Feature"
+    id: str
+    geometry: PointGeometry
+    properties: ClusterProperties
+
+
+class ZefirMapSummaryResponse(BaseModel):
+    buildingCount: int
+    buildingTypes: dict[str, int]
+    heatTypes: dict[str, int]
+    pointCount: int
+    emissions: dict[str, float]
+
+
+class QueryFeature(BaseModel):
+    type: Literal["Feature"] = "Feature"
+    id: int | str | None = None
+    geometry: Annotated[
+        PolygonGeometry | MultiPolygonGeometry, Field(discriminator="type")
+    ]
+    properties: dict | None = None
+
+
+class QueryFeatureCollection(BaseModel):
+    type: Literal["FeatureCollection"] = Field("FeatureCollection", init=False)
+    features: list[QueryFeature]
+
+
+class ZefirMapJoinResponse(BaseModel):
+    id: int | str | None
+    buildingIds: list[int] | None = None
+    summary: ZefirMapSummaryResponse | None = None
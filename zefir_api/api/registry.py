@@ -0,0 +1,166 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Generic, Hashable, Iterable, Iterator, TypeVar
+
+_logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class ResourceRegistry(Generic[K, V]):
+    """
+    Collection of resources built on first access and evicted in least-recently-used order.
+
+    Parameters:
+    - keys (Iterable): all keys the registry can serve, resources are not built for them up front.
+    - loader (Callable): builds the resource for a given key.
+    - sizeof (Callable | None): estimates resource size in bytes, required for max_bytes budget.
+    - max_items (int | None): maximum number of resident resources, None means unlimited.
+    - max_bytes (int | None): maximum estimated size of resident resources, None means unlimited.
+    - pinned (Iterable): keys which are never evicted once loaded.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[K],
+        loader: Callable[[K], V],
+        sizeof: Callable[[V], int] | None = None,
+        max_items: int | None = None,
+        max_bytes: int | None = None,
+        pinned: Iterable[K] = (),
+    ) -> None:
+        self._keys: tuple[K, ...] = tuple(keys)
+        self._loader = loader
+        self._sizeof = sizeof
+        self._max_items = max_items
+        self._max_bytes = max_bytes
+        self._pinned = frozenset(pinned)
+        self._resources: OrderedDict[K, V] = OrderedDict()
+        self._sizes: dict[K, int] = {}
+        self._reset_locks()
+        self._reload_hooks: list[Callable[[K], None]] = []
+        if hasattr(os, "register_at_fork"):
+            # a lock held by another thread while the process forks is never released in the child
+            os.register_at_fork(
+                after_in_child=partial(_reset_locks_after_fork, weakref.ref(self))
+            )
+
+    def _reset_locks(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks: dict[K, threading.Lock] = {
+            key: threading.Lock() for key in self._keys
+        }
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._key_locks
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, key: K) -> V:
+        if key not in self._key_locks:
+            raise KeyError(f"{key} not found in registry")
+        with self._lock:
+            if key in self._resources:
+                self._resources.move_to_end(key)
+                return self._resources[key]
+        with self._key_locks[key]:
+            with self._lock:
+                if key in self._resources:
+                    self._resources.move_to_end(key)
+                    return self._resources[key]
+            resource = self._loader(key)
+            self.add(key, resource)
+        return resource
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        return self[key] if key in self else default
+
+    @property
+    def resident(self) -> list[K]:
+        with self._lock:
+            return list(self._resources)
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def add(self, key: K, resource: V) -> None:
+        size = self._sizeof(resource) if self._sizeof is not None else 0
+        with self._lock:
+            self._resources[key] = resource
+            self._resources.move_to_end(key)
+            self._sizes[key] = size
+            self._evict_over_budget(keep=key)
+
+    def preload(self, keys: Iterable[K] | None = None) -> None:
+        for key in self._keys if keys is None else keys:
+            self[key]
+
+    def evict(self, key: K) -> None:
+        with self._lock:
+            self._resources.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def register_reload_hook(self, hook: Callable[[K], None]) -> None:
+        self._reload_hooks.append(hook)
+
+    def reload(self, key: K) -> None:
+        """Drops the resource, so it is built again on next access, and notifies reload hooks."""
+        self.evict(key)
+        for hook in self._reload_hooks:
+            hook(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._resources.clear()
+            self._sizes.clear()
+
+    def _is_over_budget(self) -> bool:
+        if self._max_items is not None and len(self._resources) > self._max_items:
+            return True
+        return (
+            self._max_bytes is not None and sum(self._sizes.values()) > self._max_bytes
+        )
+
+    def _evict_over_budget(self, keep: K) -> None:
+        candidates = [
+            key for key in self._resources if key not in self._pinned and key != keep
+        ]
+        while candidates and self._is_over_budget():
+            key = candidates.pop(0)
+            del self._resources[key]
+            del self._sizes[key]
+            _logger.info(f"Resource {key} evicted from registry")
+
+
+def _reset_locks_after_fork(
+    registry_ref: "weakref.ref[ResourceRegistry]",
+) -> None:
+    if (registry := registry_ref()) is not None:
+        registry._reset_locks()
@@ -0,0 +1,92 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Final, Iterable
+
+import pandas as pd
+from pyzefir.optimization.results import ENERGY_TYPE_LABEL
+from pyzefir.postprocessing.results_handler import GeneralResultDirectory
+
+# result families stored as one hourly frame per element
+HOURLY_RESULT_FAMILIES: Final[dict[str, tuple[str, ...]]] = {
+    GeneralResultDirectory.GENERATORS_RESULTS: (
+        "generation",
+        "generation_per_energy_type",
+        "dump_energy",
+        "dump_energy_per_energy_type",
+    ),
+    GeneralResultDirectory.STORAGES_RESULTS: ("generation", "load"),
+    GeneralResultDirectory.LINES_RESULTS: ("flow",),
+    GeneralResultDirectory.BUS_RESULTS: ("generation_ens",),
+}
+# families in long format, hour index repeated per energy type in ENERGY_TYPE_LABEL column
+ENERGY_TYPE_RESULT_FAMILIES: Final[frozenset[str]] = frozenset(
+    {"generation_per_energy_type", "dump_energy_per_energy_type"}
+)
+
+
+def _summarize_frames(family: str, frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    if family not in ENERGY_TYPE_RESULT_FAMILIES:
+        return pd.DataFrame.from_dict(
+            {name: df.sum() for name, df in frames.items()}, orient="index"
+        )
+    if not frames:
+        return pd.DataFrame(
+            index=pd.MultiIndex.from_tuples([], names=[None, ENERGY_TYPE_LABEL])
+        )
+    return pd.concat(
+        {name: df.groupby(ENERGY_TYPE_LABEL).sum() for name, df in frames.items()}
+    )
+
+
+def summarize_hourly_results(
+    result_dict: dict[str, dict[str, dict[str, pd.DataFrame]]]
+) -> dict[str, dict[str, pd.DataFrame]]:
+    """
+    Collapses hourly result families into yearly totals.
+
+    Parameters:
+    - result_dict (dict): ZefirEngine results, group -> family -> element -> hour x year frame.
+
+    Returns:
+    dict: group -> family -> element x year frame of values summed over hours,
+    (element, energy type) x year frame for families in ENERGY_TYPE_RESULT_FAMILIES.
+    """
+    yearly_results: dict[str, dict[str, pd.DataFrame]] = {}
+    for group, families in HOURLY_RESULT_FAMILIES.items():
+        for family in families:
+            frames = result_dict.get(group, {}).get(family)
+            if frames is None:
+                continue
+            yearly_results.setdefault(group, {})[family] = _summarize_frames(
+                family, frames
+            )
+    return yearly_results
+
+
+def drop_hourly_results(
+    result_dict: dict[str, dict[str, dict[str, pd.DataFrame]]],
+    families: Iterable[str],
+) -> None:
+    """
+    Removes hourly frames of given families, in group/family format, from result_dict.
+    Queries of ZefirEngine which read a dropped family are no longer available.
+    """
+    for group_family in families:
+        group, _, family = group_family.partition("/")
+        if family not in HOURLY_RESULT_FAMILIES.get(group, ()):
+            raise ValueError(f"{group_family} is not an hourly result family")
+        result_dict.get(group, {}).pop(family, None)
@@ -19,6 +19,9 @@ from typing import Any
 
 from fastapi import APIRouter
 
+from zefir_api.api.map import map_resource, points_resource
+from zefir_api.api.zefir_engine import ze
+
 _logger = logging.getLogger(__name__)
 
 root_router = APIRouter(prefix="")
@@ -38,3 +41,16 @@ def get_analytics_version() -> dict[str, Any]:
 
     _logger.debug(f"{zefir_analytics.__version__}")
     return {"zefir_analytics version": zefir_analytics.__version__}
+
+
+@root_router.get("/health")
+def get_health() -> dict[str, Any]:
+    return {
+        "status": "ok",
+        "resident_scenarios": ze.resident,
+        "resident_engines_bytes": ze.resident_bytes,
+        "resident_polygons_maps": map_resource.resident,
+        "resident_points_maps": points_resource.resident,
+        "resident_maps_bytes": map_resource.resident_bytes
+        + points_resource.resident_bytes,
+    }
@@ -14,57 +14,90 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from fastapi import APIRouter, HTTPException, Query, status
+from typing import Any, Callable, Final
 
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from zefir_analytics import ZefirEngine
+
+from zefir_api.api.cache import ResponseCache
 from zefir_api.api.crud.aggregate import get_agg_totals, get_details, get_stacks_info
+from zefir_api.api.json_response import create_etag, create_json_response, encode_json
 from zefir_api.api.parameters import AggregateType
 from zefir_api.api.payload.zefir_aggregate import (
     ZefirAggregateDetail,
     ZefirAggregateStacks,
     ZefirAggregateTotals,
 )
-from zefir_api.api.zefir_engine import ze
+from zefir_api.api.zefir_engine import get_scenario_fingerprint, ze
 
 zefir_agg_router = APIRouter(prefix="/zefir_aggregate")
+zefir_agg_cache: Final[ResponseCache[bytes]] = ResponseCache()
+ze.register_reload_hook(zefir_agg_cache.invalidate)
 
 
-@zefir_agg_router.get("/get_totals", response_model=ZefirAggregateTotals)
-def get_zefir_agg_totals(
+def _create_agg_response(
+    request: Request,
+    scenario_id: int,
     aggregate_type: AggregateType,
-    scenario_id: int = Query(0),
-) -> ZefirAggregateTotals:
+    response_type: Any,
+    method: Callable[[ZefirEngine, AggregateType], Any],
+) -> Response:
     if scenario_id not in ze:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Scenario_id {scenario_id} not found",
         )
-    engine = ze[scenario_id]
-    return get_agg_totals(engine, aggregate_type)
+    return create_json_response(
+        request=request,
+        etag=create_etag(get_scenario_fingerprint(scenario_id), request),
+        content=lambda: zefir_agg_cache.get_or_compute(
+            scenario_id,
+            (method.__name__, aggregate_type),
+            lambda: encode_json(response_type, method(ze[scenario_id], aggregate_type)),
+        ),
+    )
+
+
+@zefir_agg_router.get("/get_totals", response_model=ZefirAggregateTotals)
+def get_zefir_agg_totals(
+    request: Request,
+    aggregate_type: AggregateType,
+    scenario_id: int = Query(0),
+) -> Response:
+    return _create_agg_response(
+        request=request,
+        scenario_id=scenario_id,
+        aggregate_type=aggregate_type,
+        response_type=ZefirAggregateTotals,
+        method=get_agg_totals,
+    )
 
 
 @zefir_agg_router.get("/get_stacks", response_model=list[ZefirAggregateStacks])
 def get_zefir_agg_stacks(
+    request: Request,
     aggregate_type: AggregateType,
     scenario_id: int = Query(0),
-) -> list[ZefirAggregateStacks]:
-    if scenario_id not in ze:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Scenario_id {scenario_id} not found",
-        )
-    engine = ze[scenario_id]
-    return get_stacks_info(engine, aggregate_type)
+) -> Response:
+    return _create_agg_response(
+        request=request,
+        scenario_id=scenario_id,
+        aggregate_type=aggregate_type,
+        response_type=list[ZefirAggregateStacks],
+        method=get_stacks_info,
+    )
 
 
 @zefir_agg_router.get("/details", response_model=list[ZefirAggregateDetail])
 def get_zefir_agg_details(
+    request: Request,
     aggregate_type: AggregateType,
     scenario_id: int = Query(0),
-) -> list[ZefirAggregateDetail]:
-    if scenario_id not in ze:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Scenario_id {scenario_id} not found",
-        )
-    engine = ze[scenario_id]
-    return get_details(engine, aggregate_type)
+) -> Response:
+    return _create_agg_response(
+        request=request,
+        scenario_id=scenario_id,
+        aggregate_type=aggregate_type,
+        response_type=list[ZefirAggregateDetail],
+        method=get_details,
+    )
@@ -14,9 +14,10 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
-from zefir_api.api.crud.zefir_data import method_to_data_category_map
+from zefir_api.api.crud.zefir_data import get_zefir_data_json, zefir_data_cache
+from zefir_api.api.json_response import create_etag, create_json_response
 from zefir_api.api.parameters import DataCategory
 from zefir_api.api.payload.zefir_data import (
     ZefirDataResponse,
@@ -24,24 +25,32 @@ from zefir_api.api.payload.zefir_data import (
     ZefirTechnologyTranslationResponse,
     ZefirYearsResponse,
 )
-from zefir_api.api.zefir_engine import ze
+from zefir_api.api.zefir_engine import get_scenario_fingerprint, ze
 
 zefir_data_router = APIRouter(prefix="/zefir_data")
 
 
 @zefir_data_router.get("/get_data", response_model=ZefirDataResponse)
 def get_zefir_data(
+    request: Request,
     data_category: DataCategory,
     scenario_id: int = Query(0),
-) -> ZefirDataResponse:
+) -> Response:
     if scenario_id not in ze:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Scenario_id {scenario_id} not found",
         )
-    engine = ze[scenario_id]
-    method = method_to_data_category_map[data_category]
-    return method(engine)
+    return create_json_response(
+        request=request,
+        etag=create_etag(get_scenario_fingerprint(scenario_id), request),
+        content=lambda: get_zefir_data_json(scenario_id, data_category),
+    )
+
+
+@zefir_data_router.get("/cache_stats")
+def get_cache_stats() -> dict[str, int]:
+    return zefir_data_cache.stats
 
 
 @zefir_data_router.get("/get_years", response_model=ZefirYearsResponse)
@@ -14,20 +14,51 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from fastapi import APIRouter, HTTPException
+from typing import Annotated, Final
+
+from fastapi import APIRouter, Body, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from starlette import status
 
-from zefir_api.api.crud.map_handler import get_buildings_from_geometry, get_points
-from zefir_api.api.map import map_resource, points_resource
+from zefir_api.api.config import params_config
+from zefir_api.api.crud.map_handler import (
+    FEATURE_COLUMN,
+    cluster_points,
+    create_geometry,
+    filter_points,
+    get_building_features_from_geometry,
+    get_building_ids_per_geometry,
+    get_summaries_per_geometry,
+    get_summary_from_geometry,
+)
+from zefir_api.api.crud.map_lod import select_lod_column
+from zefir_api.api.crud.map_tiles import (
+    MAX_TILE_ZOOM,
+    MVT_MEDIA_TYPE,
+    TileCache,
+    create_buildings_tile,
+    is_valid_tile,
+)
+from zefir_api.api.json_response import encode_json, stream_json_fragments
+from zefir_api.api.map import get_polygons_fingerprint, map_resource, points_resource
+from zefir_api.api.parameters import MapJoinResult, PointEmission
 from zefir_api.api.payload.zefir_map import (
     MultiPolygonGeometry,
     PolygonGeometry,
+    QueryFeatureCollection,
     ZefirMapBuildingResponse,
+    ZefirMapClusterResponse,
+    ZefirMapJoinResponse,
     ZefirMapPointResponse,
+    ZefirMapSummaryResponse,
 )
 from zefir_api.api.zefir_engine import area_scenario_mapping
 
 zefir_map_router = APIRouter(prefix="/zefir_map")
+tile_cache: Final = TileCache(
+    max_items=params_config.tile_cache_size,
+    cache_path=params_config.tile_cache_path,
+)
 
 
 @zefir_map_router.post(
@@ -36,17 +67,23 @@ zefir_map_router = APIRouter(prefix="/zefir_map")
 def get_filtered_geometries_in_polygon(
     geometry: PolygonGeometry,
     area_id: int = 0,
-) -> list[ZefirMapBuildingResponse]:
+    zoom: int | None = Query(None, ge=0, le=MAX_TILE_ZOOM),
+    tolerance: float | None = Query(None, gt=0),
+) -> StreamingResponse:
     area = area_scenario_mapping.get(area_id)
     if area is None or (area_map_resource := map_resource.get(area.name)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Area ID {area_id} not found",
         )
-    return get_buildings_from_geometry(
+    features = get_building_features_from_geometry(
         resource_df=area_map_resource,
         coordinates=geometry.coordinates,
         geometry_type=geometry.type,
+        feature_column=select_lod_column(zoom=zoom, tolerance=tolerance),
+    )
+    return StreamingResponse(
+        stream_json_fragments(features), media_type="application/json"
     )
 
 
@@ -56,26 +93,166 @@ def get_filtered_geometries_in_polygon(
 def get_filtered_geometries_in_multipolygon(
     geometry: MultiPolygonGeometry,
     area_id: int = 0,
-) -> list[ZefirMapBuildingResponse]:
+    zoom: int | None = Query(None, ge=0, le=MAX_TILE_ZOOM),
+    tolerance: float | None = Query(None, gt=0),
+) -> StreamingResponse:
     area = area_scenario_mapping.get(area_id)
     if area is None or (area_map_resource := map_resource.get(area.name)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Area ID {area_id} not found",
         )
-    return get_buildings_from_geometry(
+    features = get_building_features_from_geometry(
         resource_df=area_map_resource,
         coordinates=geometry.coordinates,
         geometry_type=geometry.type,
+        feature_column=select_lod_column(zoom=zoom, tolerance=tolerance),
+    )
+    return StreamingResponse(
+        stream_json_fragments(features), media_type="application/json"
+    )
+
+
+@zefir_map_router.post("/summary", response_model=ZefirMapSummaryResponse)
+def get_map_summary(
+    geometry: Annotated[
+        PolygonGeometry | MultiPolygonGeometry, Body(discriminator="type")
+    ],
+    area_id: int = 0,
+) -> ZefirMapSummaryResponse:
+    area = area_scenario_mapping.get(area_id)
+    if (
+        area is None
+        or (area_map_resource := map_resource.get(area.name)) is None
+        or (area_point_resource := points_resource.get(area.name)) is None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Area ID {area_id} not found",
+        )
+    return get_summary_from_geometry(
+        buildings_df=area_map_resource,
+        points_df=area_point_resource,
+        coordinates=geometry.coordinates,
+        geometry_type=geometry.type,
     )
 
 
-@zefir_map_router.get("/get_points", response_model=list[ZefirMapPointResponse])
-def get_map_points(area_id: int = 0) -> list[ZefirMapPointResponse]:
+@zefir_map_router.post(
+    "/batch_join",
+    response_model=list[ZefirMapJoinResponse],
+    response_model_exclude_none=True,
+)
+def join_map_features(
+    feature_collection: QueryFeatureCollection,
+    area_id: int = 0,
+    result: MapJoinResult = MapJoinResult.IDS,
+) -> list[ZefirMapJoinResponse]:
+    area = area_scenario_mapping.get(area_id)
+    if (
+        area is None
+        or (area_map_resource := map_resource.get(area.name)) is None
+        or (area_point_resource := points_resource.get(area.name)) is None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Area ID {area_id} not found",
+        )
+    geometries = [
+        create_geometry(feature.geometry.coordinates, feature.geometry.type)
+        for feature in feature_collection.features
+    ]
+    if result == MapJoinResult.SUMMARY:
+        summaries = get_summaries_per_geometry(
+            geometries=geometries,
+            buildings_df=area_map_resource,
+            points_df=area_point_resource,
+        )
+        return [
+            ZefirMapJoinResponse(id=feature.id, summary=summary)
+            for feature, summary in zip(feature_collection.features, summaries)
+        ]
+    building_ids = get_building_ids_per_geometry(
+        geometries=geometries, buildings_df=area_map_resource
+    )
+    return [
+        ZefirMapJoinResponse(id=feature.id, buildingIds=ids)
+        for feature, ids in zip(feature_collection.features, building_ids)
+    ]
+
+
+def _parse_bbox(bbox: str | None) -> tuple[float, float, float, float] | None:
+    if bbox is None:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"bbox {bbox} is not in format min_lon,min_lat,max_lon,max_lat",
+        )
+    return min_lon, min_lat, max_lon, max_lat
+
+
+@zefir_map_router.get(
+    "/get_points",
+    response_model=list[ZefirMapPointResponse | ZefirMapClusterResponse],
+)
+def get_map_points(
+    area_id: int = 0,
+    bbox: str | None = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int | None = Query(None, ge=0, le=MAX_TILE_ZOOM),
+    heat_type: list[str] | None = Query(None, alias="heatType"),
+    boiler_emission: list[str] | None = Query(None, alias="boilerEmission"),
+    emission: PointEmission | None = None,
+    min_emission: float | None = None,
+) -> Response:
     area = area_scenario_mapping.get(area_id)
     if area is None or (area_point_resource := points_resource.get(area.name)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Area ID {area_id} not found",
         )
-    return get_points(resource_df=area_point_resource)
+    points = filter_points(
+        resource_df=area_point_resource,
+        bbox=_parse_bbox(bbox),
+        heat_types=heat_type,
+        boiler_emissions=boiler_emission,
+        emission=emission,
+        min_emission=min_emission,
+    )
+    if zoom is not None and zoom < params_config.points_cluster_max_zoom:
+        return Response(
+            content=encode_json(
+                list[ZefirMapClusterResponse], cluster_points(points, zoom)
+            ),
+            media_type="application/json",
+        )
+    return StreamingResponse(
+        stream_json_fragments(points[FEATURE_COLUMN]), media_type="application/json"
+    )
+
+
+@zefir_map_router.get(
+    "/tiles/{area_id}/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+)
+def get_buildings_tile(area_id: int, z: int, x: int, y: int) -> Response:
+    area = area_scenario_mapping.get(area_id)
+    if area is None or (area_map_resource := map_resource.get(area.name)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Area ID {area_id} not found",
+        )
+    if not is_valid_tile(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tile {z}/{x}/{y} not found",
+        )
+    tile = tile_cache.get_or_create(
+        key=(area.name, z, x, y),
+        fingerprint=get_polygons_fingerprint(area.name),
+        create=lambda: create_buildings_tile(area_map_resource, z, x, y),
+    )
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE)
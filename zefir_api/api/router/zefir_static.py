@@ -14,53 +14,78 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, Callable, Final
 
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from zefir_api.api.cache import ResponseCache
 from zefir_api.api.crud.scenario_description import generate_scenarios_description
 from zefir_api.api.crud.static_aggr_data import get_aggr_static_data
 from zefir_api.api.crud.static_plots import get_static_plots
+from zefir_api.api.json_response import create_etag, create_json_response, encode_json
+from zefir_api.api.parameters import Area
 from zefir_api.api.payload.zefir_static import (
     StaticAggrDataResponse,
     StaticPlotsResponse,
     StaticScenarioDescriptionResponse,
 )
-from zefir_api.api.zefir_engine import area_scenario_mapping
+from zefir_api.api.zefir_engine import area_scenario_mapping, get_area_fingerprint, ze
 
 zefir_static_router = APIRouter(prefix="/zefir_static")
+zefir_static_cache: Final[ResponseCache[bytes]] = ResponseCache()
+ze.register_reload_hook(lambda _: zefir_static_cache.invalidate())
 
 
-@zefir_static_router.get("/get_plots", response_model=StaticPlotsResponse)
-def get_plots(area_id: int = 0) -> StaticPlotsResponse:
+def _create_static_response(
+    request: Request,
+    area_id: int,
+    response_type: Any,
+    method: Callable[[Area], Any],
+) -> Response:
     area = area_scenario_mapping.get(area_id)
     if area is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Area ID {area_id} not found",
         )
-    return get_static_plots(area.name)
+    return create_json_response(
+        request=request,
+        etag=create_etag(get_area_fingerprint(area), request),
+        content=lambda: zefir_static_cache.get_or_compute(
+            area_id,
+            request.url.path,
+            lambda: encode_json(response_type, method(area)),
+        ),
+    )
+
+
+@zefir_static_router.get("/get_plots", response_model=StaticPlotsResponse)
+def get_plots(request: Request, area_id: int = 0) -> Response:
+    return _create_static_response(
+        request=request,
+        area_id=area_id,
+        response_type=StaticPlotsResponse,
+        method=lambda area: get_static_plots(area.name),
+    )
 
 
 @zefir_static_router.get("/get_aggr_data", response_model=list[StaticAggrDataResponse])
-def get_aggr_data(area_id: int = 0) -> list[StaticAggrDataResponse]:
-    area = area_scenario_mapping.get(area_id)
-    if area is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Area ID {area_id} not found",
-        )
-    return get_aggr_static_data(area.name)
+def get_aggr_data(request: Request, area_id: int = 0) -> Response:
+    return _create_static_response(
+        request=request,
+        area_id=area_id,
+        response_type=list[StaticAggrDataResponse],
+        method=lambda area: get_aggr_static_data(area.name),
+    )
 
 
 @zefir_static_router.get(
     "/get_scenario_description", response_model=list[StaticScenarioDescriptionResponse]
 )
-def get_scenario_description(
-    area_id: int = 0,
-) -> list[StaticScenarioDescriptionResponse]:
-    area = area_scenario_mapping.get(area_id)
-    if area is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Area ID {area_id} not found",
-        )
-    return generate_scenarios_description(area)
+def get_scenario_description(request: Request, area_id: int = 0) -> Response:
+    return _create_static_response(
+        request=request,
+        area_id=area_id,
+        response_type=list[StaticScenarioDescriptionResponse],
+        method=generate_scenarios_description,
+    )
@@ -0,0 +1,145 @@
+# NCBR_backend
+# Copyright (C) 2023-2024 Narodowe Centrum Badań Jądrowych
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Final
+
+import zefir_analytics
+
+_logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION: Final[int] = 1
+_BUFFER_ALIGNMENT: Final[int] = 64
+
+
+def fingerprint_paths(*paths: Path) -> str:
+    """
+    Computes a fingerprint of the given files and directories from relative path, size and
+    modification time of every file, together with the snapshot format and zefir_analytics versions.
+    """
+    digest = hashlib.sha256(
+        f"{SNAPSHOT_FORMAT_VERSION}:{zefir_analytics.__version__}".encode()
+    )
+    for path in map(Path, paths):
+        digest.update(str(path).encode())
+        files = (
+            [path] if path.is_file() else (p for p in path.rglob("*") if p.is_file())
+        )
+        for file_path in sorted(files):
+            stat = file_path.stat()
+            digest.update(
+                f"{file_path.relative_to(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+            )
+    return digest.hexdigest()
+
+
+# mmap raises ValueError for an empty or truncated data file
+_LOAD_ERRORS: Final = (OSError, ValueError, pickle.UnpicklingError, KeyError, EOFError)
+
+
+class SnapshotStore:
+    """
+    Persists python objects in a binary snapshot which is loaded back through a memory map.
+
+    Every snapshot consists of two files:
+    - <name>.index - pickled fingerprint, buffer layout and pickle (protocol 5) payload,
+    - <name>.data - raw numpy buffers of the payload, aligned to 64 bytes.
+
+    The payload refers to the buffers out of band, so on load numpy arrays are created directly
+    on top of the copy-on-write memory map instead of being parsed or copied. Processes mapping
+    the same snapshot (e.g. gunicorn workers) share its pages until one of them writes to them.
+    """
+
+    def __init__(self, snapshot_path: Path) -> None:
+        self._snapshot_path = snapshot_path
+
+    def _get_paths(self, name: str) -> tuple[Path, Path]:
+        return (
+            self._snapshot_path / f"{name}.index",
+            self._snapshot_path / f"{name}.data",
+        )
+
+    def load(self, name: str, fingerprint: str) -> Any | None:
+        index_path, data_path = self._get_paths(name)
+        if not index_path.exists() or not data_path.exists():
+            return None
+        with open(index_path, "rb") as index_file:
+            index = pickle.load(index_file)
+        if index["fingerprint"] != fingerprint:
+            return None
+        buffers: list[memoryview] = []
+        if index["buffers"]:
+            with open(data_path, "rb") as data_file:
+                data = memoryview(
+                    mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_COPY)
+                )
+            buffers = [
+                data[slice(offset, offset + size)] for offset, size in index["buffers"]
+            ]
+        return pickle.loads(index["payload"], buffers=buffers)
+
+    def save(self, name: str, fingerprint: str, obj: Any) -> None:
+        index_path, data_path = self._get_paths(name)
+        self._snapshot_path.mkdir(parents=True, exist_ok=True)
+        pickle_buffers: list[pickle.PickleBuffer] = []
+        payload = pickle.dumps(obj, protocol=5, buffer_callback=pickle_buffers.append)
+        layout: list[tuple[int, int]] = []
+        tmp_data_path = data_path.with_suffix(f".data.{os.getpid()}")
+        with open(tmp_data_path, "wb") as data_file:
+            position = 0
+            for pickle_buffer in pickle_buffers:
+                raw = pickle_buffer.raw()
+                padding = -position % _BUFFER_ALIGNMENT
+                data_file.write(b"\0" * padding)
+                position += padding
+                layout.append((position, raw.nbytes))
+                data_file.write(raw)
+                position += raw.nbytes
+        tmp_index_path = index_path.with_suffix(f".index.{os.getpid()}")
+        with open(tmp_index_path, "wb") as index_file:
+            pickle.dump(
+                {"fingerprint": fingerprint, "buffers": layout, "payload": payload},
+                index_file,
+                protocol=5,
+            )
+        os.replace(tmp_data_path, data_path)
+        os.replace(tmp_index_path, index_path)
+
+    def load_or_create(
+        self, name: str, fingerprint: str, factory: Callable[[], Any]
+    ) -> Any:
+        try:
+            if (obj := self.load(name, fingerprint)) is not None:
+                _logger.info(f"Snapshot {name} loaded")
+                return obj
+        except _LOAD_ERRORS as e:
+            _logger.warning(f"Snapshot {name} could not be loaded: {e}")
+        obj = factory()
+        try:
+            self.save(name, fingerprint, obj)
+            # map freshly parsed data back from the snapshot, so its buffers live in
+            # page cache shared between processes instead of the private heap,
+            # the parsed data is kept if another process has replaced the snapshot meanwhile
+            if (loaded := self.load(name, fingerprint)) is not None:
+                return loaded
+        except (pickle.PicklingError, *_LOAD_ERRORS) as e:
+            _logger.warning(f"Snapshot {name} could not be saved: {e}")
+        return obj
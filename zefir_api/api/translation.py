@@ -109,4 +109,4 @@ class NameTranslator(JsonLoader):
         )
 
 
-translator: Final = NameTranslator(next(iter(ze.values())).network)
+translator: Final = NameTranslator(ze[next(iter(ze))].network)
@@ -18,12 +18,27 @@ import json
 from pathlib import Path
 from typing import Final
 
+import pandas as pd
 from zefir_analytics import ZefirEngine
 
+from zefir_api import __version__
 from zefir_api.api.config import params_config
+from zefir_api.api.engine_builder import build_engine, build_engines
 from zefir_api.api.parameters import Area, Scenario
+from zefir_api.api.registry import ResourceRegistry
+from zefir_api.api.snapshot import fingerprint_paths
 
 AREA_MAP = dict[int, Area]
+# area directories the engine, static and aggregate responses are computed from,
+# map/ is left out as workers write its parquet caches lazily
+AREA_INPUT_DIRS: Final[tuple[str, ...]] = (
+    "source_csv",
+    "results",
+    "parameters",
+    "configs",
+    "static_data",
+    "transport",
+)
 
 
 def load_area_scenario_mapping(mapping_filepath: Path) -> AREA_MAP:
@@ -52,20 +67,65 @@ def create_area_scenario_mapping(area_json: dict) -> AREA_MAP:
     return result_dict
 
 
-def create_zefir_engines(area_scenario_map: AREA_MAP) -> dict[int, ZefirEngine]:
+def get_scenario_config_paths(area_scenario_map: AREA_MAP) -> dict[int, Path]:
     return {
-        scenario.id: ZefirEngine.create_from_config(
-            params_config.get_config_path(area.name, scenario.name)
-        )
+        scenario.id: params_config.get_config_path(area.name, scenario.name)
         for area in area_scenario_map.values()
         for scenario in area.scenarios
     }
 
 
+def create_zefir_engines(
+    area_scenario_map: AREA_MAP, workers: int = 1
+) -> dict[int, ZefirEngine]:
+    return build_engines(get_scenario_config_paths(area_scenario_map), workers)
+
+
+def _frames_nbytes(data: dict | pd.DataFrame) -> int:
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=True).sum())
+    return sum(_frames_nbytes(value) for value in data.values())
+
+
+def estimate_engine_nbytes(engine: ZefirEngine) -> int:
+    return (
+        _frames_nbytes(engine.source_dict)
+        + _frames_nbytes(engine.result_dict)
+        + _frames_nbytes(getattr(engine, "yearly_results", {}))
+    )
+
+
+def create_engine_registry(
+    area_scenario_map: AREA_MAP,
+) -> ResourceRegistry[int, ZefirEngine]:
+    config_paths = get_scenario_config_paths(area_scenario_map)
+    registry: ResourceRegistry[int, ZefirEngine] = ResourceRegistry(
+        keys=config_paths,
+        loader=lambda scenario_id: build_engine(config_paths[scenario_id]),
+        sizeof=estimate_engine_nbytes,
+        max_items=params_config.max_loaded_engines,
+        max_bytes=params_config.max_engines_bytes,
+        pinned=params_config.pinned_scenarios,
+    )
+    if params_config.lazy_engines:
+        registry.preload(
+            [sid for sid in params_config.pinned_scenarios if sid in registry]
+        )
+    else:
+        engines = create_zefir_engines(
+            area_scenario_map, workers=params_config.engine_workers
+        )
+        for scenario_id, engine in engines.items():
+            registry.add(scenario_id, engine)
+    return registry
+
+
 area_scenario_mapping: Final[AREA_MAP] = load_area_scenario_mapping(
     params_config.areas_mapping_filepath
 )
-ze: Final = create_zefir_engines(area_scenario_mapping)
+ze: Final = create_engine_registry(area_scenario_mapping)
+_area_fingerprints: Final[dict[str, str]] = {}
+ze.register_reload_hook(lambda _: _area_fingerprints.clear())
 
 
 def get_scenario_id(scenario_name: str) -> int:
@@ -74,3 +134,31 @@ def get_scenario_id(scenario_name: str) -> int:
             if scenario.name == scenario_name:
                 return scenario.id
     raise ValueError(f"Scenario {scenario_name} not found")
+
+
+def get_area_fingerprint(area: Area) -> str:
+    """
+    Fingerprint of all files the responses of given area and its scenarios are computed from,
+    combined with zefir_api version, so responses of a new release get new ETags.
+    Only AREA_INPUT_DIRS of the area are fingerprinted, so files written at runtime by a worker
+    do not change the ETags it serves.
+    """
+    if area.name not in _area_fingerprints:
+        fingerprint = fingerprint_paths(
+            *(params_config.areas_path / area.name / name for name in AREA_INPUT_DIRS),
+            params_config.fuel_units_path,
+            params_config.translate_tags_path,
+            params_config.translate_names_path,
+            params_config.translate_fuels_path,
+            params_config.translate_lbs_path,
+            params_config.translate_energy_path,
+        )
+        _area_fingerprints[area.name] = f"{__version__}:{fingerprint}"
+    return _area_fingerprints[area.name]
+
+
+def get_scenario_fingerprint(scenario_id: int) -> str:
+    for area in area_scenario_mapping.values():
+        if any(scenario.id == scenario_id for scenario in area.scenarios):
+            return get_area_fingerprint(area)
+    raise ValueError(f"Scenario_id {scenario_id} not found")